@@ -0,0 +1,287 @@
+"""Throughput benchmarks for the card, deck and strength hot paths.
+
+Run ``python -m benchmarks`` to print ops/sec and per-op latency percentiles,
+``--save baseline.json`` to keep the results and ``--compare baseline.json``
+to fail (exit status 1) when a benchmark got slower than the threshold.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Optional
+
+from card import CARDS, Board, Deck, Hand, Rng
+
+# name -> (factory, batch). A factory does any setup and returns a callable
+# that performs ``batch`` operations.
+BENCHMARKS: dict[str, tuple[Callable[[], Callable[[], None]], int]] = {}
+
+PREDICATES = [
+    "has_pair",
+    "has_two_pair",
+    "has_three_of_a_kind",
+    "has_straight",
+    "has_flush",
+    "has_full_house",
+    "has_four_of_a_kind",
+    "has_straight_flush",
+    "has_royal_flush",
+]
+
+
+def benchmark(name: str, batch: int):
+    def register(factory):
+        BENCHMARKS[name] = (factory, batch)
+        return factory
+
+    return register
+
+
+def _random_hands(count: int, size: int = 5) -> list[list]:
+    rng = random.Random(0)
+    return [rng.sample(CARDS, size) for _ in range(count)]
+
+
+@benchmark("deck.construct", batch=1000)
+def _deck_construct():
+    def run():
+        for _ in range(1000):
+            Deck()
+
+    return run
+
+
+@benchmark("deck.shuffle", batch=1000)
+def _deck_shuffle():
+    deck = Deck(rng=Rng(0))
+
+    def run():
+        for _ in range(1000):
+            deck.reset()
+            deck.shuffle()
+            deck.cards
+
+    return run
+
+
+@benchmark("deck.draw_25", batch=1000)
+def _deck_draw():
+    deck = Deck(rng=Rng(0))
+
+    def run():
+        for _ in range(1000):
+            deck.reset()
+            deck.draw_cards(25)
+
+    return run
+
+
+@benchmark("hand.random", batch=1000)
+def _hand_random():
+    def run():
+        for _ in range(1000):
+            Hand.random()
+
+    return run
+
+
+@benchmark("board.random", batch=200)
+def _board_random():
+    def run():
+        for _ in range(200):
+            Board.random()
+
+    return run
+
+
+def _predicate_benchmark(predicate: str):
+    def factory():
+        from strength import HandStrengthEvaluation
+
+        hands = [Hand(cards) for cards in _random_hands(1000)]
+
+        def run():
+            for hand in hands:
+                getattr(HandStrengthEvaluation(hand), predicate)()
+
+        return run
+
+    return factory
+
+
+for _predicate in PREDICATES:
+    benchmark(f"strength.{_predicate}", batch=1000)(_predicate_benchmark(_predicate))
+
+
+@benchmark("strength.evaluate5", batch=10000)
+def _evaluate5():
+    from strength import evaluate5
+
+    hands = _random_hands(10000)
+
+    def run():
+        for hand in hands:
+            evaluate5(*hand)
+
+    return run
+
+
+@benchmark("strength.evaluate_best_7", batch=10000)
+def _evaluate_best():
+    from strength import evaluate_best
+
+    hands = _random_hands(10000, 7)
+
+    def run():
+        for hand in hands:
+            evaluate_best(hand)
+
+    return run
+
+
+@benchmark("strength.evaluate_batch_7", batch=100000)
+def _evaluate_batch():
+    import numpy as np
+
+    from strength import evaluate_batch
+
+    ids = np.array([[card.id for card in hand] for hand in _random_hands(100000, 7)])
+
+    def run():
+        evaluate_batch(ids)
+
+    return run
+
+
+@benchmark("scoring.head_to_head", batch=10000)
+def _head_to_head():
+    from scoring import Scorer, board_ranks
+
+    scorer = Scorer()
+    pairs = [(board_ranks(Board.random()), board_ranks(Board.random())) for _ in range(10000)]
+
+    def run():
+        for ranks, other_ranks in pairs:
+            scorer.head_to_head(ranks, other_ranks)
+
+    return run
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_benchmark(name: str, repeat: int = 20) -> dict:
+    """Time ``repeat`` batches after one warm-up batch.
+
+    Percentiles are of the mean per-op time within each batch.
+    """
+    factory, batch = BENCHMARKS[name]
+    run = factory()
+    run()
+    per_op_ns = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        run()
+        per_op_ns.append((time.perf_counter_ns() - start) / batch)
+    per_op_ns.sort()
+    median = _percentile(per_op_ns, 0.5)
+    return {
+        "batch": batch,
+        "repeat": repeat,
+        "ops_per_sec": 1e9 / median,
+        "p50_ns": median,
+        "p90_ns": _percentile(per_op_ns, 0.9),
+        "p99_ns": _percentile(per_op_ns, 0.99),
+    }
+
+
+def run_all(names: list[str], repeat: int = 20) -> dict:
+    results = {}
+    for name in names:
+        try:
+            results[name] = run_benchmark(name, repeat)
+        except ImportError as error:
+            print(f"skipping {name}: {error}", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Names of benchmarks whose ops/sec dropped by more than ``threshold`` (0.1 = 10%)."""
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous and result["ops_per_sec"] < previous["ops_per_sec"] * (1 - threshold):
+            regressions.append(name)
+    return regressions
+
+
+def _format(name: str, result: dict, previous: Optional[dict]) -> str:
+    line = (
+        f"{name:<32}{result['ops_per_sec']:>14,.0f}"
+        f"{result['p50_ns']:>10.0f}{result['p90_ns']:>10.0f}{result['p99_ns']:>10.0f}"
+    )
+    if previous:
+        line += f"{result['ops_per_sec'] / previous['ops_per_sec'] - 1:>+10.1%}"
+    return line
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=20, help="timed batches per benchmark")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown that counts as a regression (default 0.1 = 10%%)"
+    )
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    current = run_all(names, args.repeat)
+
+    header = f"{'benchmark':<32}{'ops/sec':>14}{'p50 ns':>10}{'p90 ns':>10}{'p99 ns':>10}"
+    print(header + (f"{'change':>10}" if baseline else ""))
+    for name, result in current["results"].items():
+        print(_format(name, result, baseline["results"].get(name) if baseline else None))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(current, file, indent=2)
+    if baseline:
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"Regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def test_run_benchmark():
+    """Test that a benchmark reports sane throughput and ordered percentiles."""
+    result = run_benchmark("hand.random", repeat=3)
+    assert result["ops_per_sec"] > 0
+    assert result["p50_ns"] <= result["p90_ns"] <= result["p99_ns"]
+
+
+def test_compare_flags_regressions():
+    """Test the regression threshold."""
+    baseline = {"results": {"fast": {"ops_per_sec": 100.0}, "slow": {"ops_per_sec": 100.0}}}
+    current = {"results": {"fast": {"ops_per_sec": 95.0}, "slow": {"ops_per_sec": 80.0}, "new": {"ops_per_sec": 1.0}}}
+    assert compare(baseline, current, threshold=0.1) == ["slow"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
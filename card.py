@@ -1,6 +1,7 @@
+import os
 import random
 from enum import Enum
-from typing import Iterator
+from collections.abc import Iterable, Iterator
 
 
 class Suit(Enum):
@@ -51,17 +52,80 @@ RANK_ASCII = {
 }
 
 
+SUITS = tuple(Suit)
+RANKS = tuple(sorted(Rank, key=lambda rank: rank.value))
+
+# One prime per rank (deuce first), so a product of primes identifies a
+# multiset of ranks regardless of card order.
+RANK_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+_SUIT_INDEX = {suit: index for index, suit in enumerate(SUITS)}
+_RANK_INDEX = {rank: index for index, rank in enumerate(RANKS)}
+
+
 class Card:
-    def __init__(self, suit: Suit, rank: Rank):
-        self.suit = suit
-        self.rank = rank
+    """A playing card.
+
+    There are exactly 52 ``Card`` instances, plus the two ``JOKERS``.
+    ``Card(suit, rank)`` returns the interned instance instead of allocating
+    a new one, so cards can be compared by identity and shared freely
+    between hands, decks and processes. Each card carries precomputed
+    fields used by the evaluator:
+
+    - ``id``: ``rank_index * 4 + suit_index`` in ``range(52)``, deuce first
+    - ``prime``: the prime of its rank (see ``RANK_PRIMES``)
+    - ``rank_bit``: ``1 << rank_index``
+    - ``suit_bit``: ``1 << suit_index``
+    """
+
+    __slots__ = ("id", "suit", "rank", "prime", "rank_bit", "suit_bit")
+
+    def __new__(cls, suit: Suit, rank: Rank) -> "Card":
+        return CARDS[_RANK_INDEX[rank] * 4 + _SUIT_INDEX[suit]]
+
+    @classmethod
+    def _intern(cls, suit: Suit, rank: Rank) -> "Card":
+        card = object.__new__(cls)
+        rank_index = _RANK_INDEX[rank]
+        suit_index = _SUIT_INDEX[suit]
+        for name, value in (
+            ("id", rank_index * 4 + suit_index),
+            ("suit", suit),
+            ("rank", rank),
+            ("prime", RANK_PRIMES[rank_index]),
+            ("rank_bit", 1 << rank_index),
+            ("suit_bit", 1 << suit_index),
+        ):
+            object.__setattr__(card, name, value)
+        return card
 
     @classmethod
     def random(cls) -> "Card":
-        return Card(
-          random.choice(list(Suit)),
-          random.choice(list(Rank))
-        )
+        return random.choice(CARDS)
+
+    @classmethod
+    def from_id(cls, card_id: int) -> "Card":
+        return _BY_ID[card_id]
+
+    @classmethod
+    def from_str(cls, text: str) -> "Card":
+        """Parse ``str(card)`` output (``"A♥"``, ``"10♠"``) or an ASCII alias (``"Ah"``, ``"Ts"``)."""
+        try:
+            return _CARD_BY_STR[text.strip()]
+        except KeyError:
+            raise ValueError(f"Unknown card: {text!r}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        return Card.from_id, (self.id,)
+
+    def __copy__(self) -> "Card":
+        return self
+
+    def __deepcopy__(self, memo) -> "Card":
+        return self
 
     def __str__(self):
         return f"{RANK_ASCII[self.rank]}{SUIT_ASCII[self.suit]}"
@@ -70,6 +134,77 @@ class Card:
         return f"Card(suit={self.suit.value}, rank={self.rank.value})"
 
 
+CARDS = tuple(Card._intern(suit, rank) for rank in RANKS for suit in SUITS)
+
+
+class Joker(Card):
+    """A wild card, which plays as whichever card makes the best hand.
+
+    There are two jokers, ids 52 and 53. They have no suit or rank, and
+    their evaluator fields are neutral (``prime`` 1, no bits), so they
+    leave a hand's rank and suit state untouched; ``Hand.wilds`` counts
+    them instead.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, index: int = 0) -> "Joker":
+        return JOKERS[index]
+
+    @classmethod
+    def _intern_joker(cls, index: int) -> "Joker":
+        joker = object.__new__(cls)
+        for name, value in (
+            ("id", 52 + index),
+            ("suit", None),
+            ("rank", None),
+            ("prime", 1),
+            ("rank_bit", 0),
+            ("suit_bit", 0),
+        ):
+            object.__setattr__(joker, name, value)
+        return joker
+
+    def __str__(self):
+        return JOKER_ASCII[self.id - 52]
+
+    def __repr__(self):
+        return f"Joker({self.id - 52})"
+
+
+JOKER_ASCII = ("🃏", "🃟")
+JOKERS = tuple(Joker._intern_joker(index) for index in range(2))
+_BY_ID = CARDS + JOKERS
+
+# The order ``Deck(shuffled=False)`` has always used: suit by suit, ace first.
+_DECK_ORDER = tuple(Card(suit, rank) for suit in Suit for rank in Rank)
+
+_RANK_ALIASES = {rank: {text, text.lower()} for rank, text in RANK_ASCII.items()}
+_RANK_ALIASES[Rank.TEN] |= {"T", "t"}
+_SUIT_ALIASES = {
+    suit: {symbol, suit.value[0], suit.value[0].upper()}
+    for suit, symbol in SUIT_ASCII.items()
+}
+_CARD_BY_STR = {
+    rank_text + suit_text: card
+    for card in CARDS
+    for rank_text in _RANK_ALIASES[card.rank]
+    for suit_text in _SUIT_ALIASES[card.suit]
+}
+_CARD_BY_STR.update({"🃏": JOKERS[0], "*": JOKERS[0], "*1": JOKERS[0], "🃟": JOKERS[1], "*2": JOKERS[1]})
+
+
+# strength imports this module, so it's imported on first use by Hand.strength.
+_hand_strength = None
+
+
+def _cards_from_ids(ids) -> list[Card]:
+    try:
+        return [_BY_ID[card_id] for card_id in ids]
+    except IndexError:
+        raise ValueError("Not a card id in buffer") from None
+
+
 class Game:
     pass
 
@@ -78,17 +213,154 @@ class Player:
     pass
 
 class Hand:
-    """A hand is a collection of cards."""
-
-    def __init__(self, cards: list[Card] = []):
-        self.cards = cards
+    """A hand is a collection of cards.
+
+    Besides its cards, a hand keeps the evaluator's view of them up to date
+    as cards are added or popped, in O(1) per card:
+
+    - ``mask``: bit ``card.id`` set for each card
+    - ``rank_counts`` / ``suit_counts``: cards held per rank / suit
+    - ``rank_mask``: bit ``rank_index`` set for each rank held
+    - ``suit_masks``: one rank mask per suit
+    - ``prime_product``: product of the cards' rank primes
+    - ``kinds``: ``kinds[n]`` is how many ranks are held exactly n times
+    - ``wilds``: how many jokers are held; they're in ``cards`` and
+      ``mask`` but none of the rank or suit state above
+    """
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        self.cards = []
+        self.mask = 0
+        self.rank_counts = [0] * 13
+        self.suit_counts = [0] * 4
+        self.rank_mask = 0
+        self.suit_masks = [0] * 4
+        self.prime_product = 1
+        self.kinds = [13, 0, 0, 0, 0]
+        self.wilds = 0
+        self._strength = None
+        for card in cards:
+            self.add_card(card)
 
     @classmethod
     def random(cls, size: int = 5) -> "Hand":
-        return Hand([Card.random() for _ in range(size)])
+        return Hand(Deck().draw_cards(size))
 
     def add_card(self, card: Card) -> None:
+        if self.mask >> card.id & 1:
+            raise ValueError(f"{card} is already in the hand")
         self.cards.append(card)
+        self.mask |= 1 << card.id
+        self._strength = None
+        if card.id >= 52:
+            self.wilds += 1
+            return
+        rank_index = card.id >> 2
+        count = self.rank_counts[rank_index]
+        self.rank_counts[rank_index] = count + 1
+        self.kinds[count] -= 1
+        self.kinds[count + 1] += 1
+        self.suit_counts[card.id & 3] += 1
+        self.rank_mask |= card.rank_bit
+        self.suit_masks[card.id & 3] |= card.rank_bit
+        self.prime_product *= card.prime
+
+    def pop_card(self) -> Card:
+        """Remove and return the last card added, e.g. to undo a hypothetical placement."""
+        card = self.cards.pop()
+        self.mask ^= 1 << card.id
+        self._strength = None
+        if card.id >= 52:
+            self.wilds -= 1
+            return card
+        rank_index = card.id >> 2
+        count = self.rank_counts[rank_index]
+        self.rank_counts[rank_index] = count - 1
+        self.kinds[count] -= 1
+        self.kinds[count - 1] += 1
+        self.suit_counts[card.id & 3] -= 1
+        if count == 1:
+            self.rank_mask ^= card.rank_bit
+        self.suit_masks[card.id & 3] ^= card.rank_bit
+        self.prime_product //= card.prime
+        return card
+
+    def strength(self) -> int:
+        """How strong the best five cards are, higher is stronger; cached until the hand changes.
+
+        Use it as a sort key: ``sorted(hands, key=Hand.strength)``. Raises
+        ValueError unless the hand has 5 to 7 cards.
+        """
+        if self._strength is None:
+            global _hand_strength
+            if _hand_strength is None:
+                from strength import hand_strength as _hand_strength
+            self._strength = _hand_strength(self)
+        return self._strength
+
+    # Hands order by strength. Equal strength is a tie, so hands with
+    # different cards can be equal; hands too small to rank are only equal
+    # to themselves. Hands are mutable, so they aren't hashable.
+    def __eq__(self, other):
+        if not isinstance(other, Hand):
+            return NotImplemented
+        if self is other:
+            return True
+        if not (5 <= len(self.cards) <= 7 and 5 <= len(other.cards) <= 7):
+            return False
+        return self.strength() == other.strength()
+
+    __hash__ = None
+
+    def __lt__(self, other):
+        if not isinstance(other, Hand):
+            return NotImplemented
+        return self.strength() < other.strength()
+
+    def __le__(self, other):
+        if not isinstance(other, Hand):
+            return NotImplemented
+        return self.strength() <= other.strength()
+
+    def __gt__(self, other):
+        if not isinstance(other, Hand):
+            return NotImplemented
+        return self.strength() > other.strength()
+
+    def __ge__(self, other):
+        if not isinstance(other, Hand):
+            return NotImplemented
+        return self.strength() >= other.strength()
+
+    def to_bytes(self) -> bytes:
+        """One byte per card, its ``Card.id``, in the order the cards were added."""
+        return bytes([card.id for card in self.cards])
+
+    @classmethod
+    def from_buffer(cls, buffer, offset: int = 0, count: int | None = None) -> "Hand":
+        """Read a hand written by ``to_bytes`` from any bytes-like object, without copying it.
+
+        ``count`` cards are read from ``offset``, by default the rest of the buffer.
+        """
+        view = memoryview(buffer)[offset:]
+        return cls(_cards_from_ids(view if count is None else view[:count]))
+
+    @classmethod
+    def from_str(cls, text: str) -> "Hand":
+        """Parse cards separated by spaces or commas (``"A♥ K♥"``, ``str(hand)``), see ``Card.from_str``."""
+        if text.strip() == "<Empty hand>":
+            return cls()
+        return cls(Card.from_str(card) for card in text.replace(",", " ").split())
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "Hand":
+        """The hand whose ``mask`` is ``mask``, cards in id order."""
+        if mask >> len(_BY_ID):
+            raise ValueError(f"Not a card mask: {mask:#x}")
+        return cls(card for card in _BY_ID if mask >> card.id & 1)
+
+    def __reduce__(self):
+        return Hand.from_buffer, (self.to_bytes(),)
 
     def __iter__(self) -> Iterator[Card]:
         return iter(self.cards)
@@ -114,30 +386,294 @@ class Board:
 
     @classmethod
     def random(cls, num_hands: int = 5) -> "Board":
-        return Board([Hand.random() for _ in range(num_hands)])
+        deck = Deck()
+        return Board([Hand(deck.draw_cards(5)) for _ in range(num_hands)])
+
 
+    @classmethod
+    def from_str(cls, text: str) -> "Board":
+        """Parse one hand per line or per ``/``-separated part (``str(board)``), see ``Hand.from_str``."""
+        return cls([Hand.from_str(row) for row in text.replace("/", "\n").splitlines()])
 
     def __str__(self):
         return "\n".join([str(hand) for hand in self.hands])
 
     def add_card(self, card: Card, hand_index: int) -> None:
-        self.hands[hand_index].add
+        self.hands[hand_index].add_card(card)
 
-class Deck:
-    def __init__(self, shuffled: bool = True):
-        self.cards = [Card(suit, rank) for suit in Suit for rank in Rank]
+    def to_bytes(self) -> bytes:
+        """The number of hands, each hand's size, then every hand's ``Hand.to_bytes``."""
+        return bytes([len(self.hands), *map(len, self.hands)]) + b"".join(hand.to_bytes() for hand in self.hands)
+
+    @classmethod
+    def from_buffer(cls, buffer, offset: int = 0) -> "Board":
+        """Read a board written by ``to_bytes`` at ``offset``, without copying the buffer."""
+        for board in cls.iter_from_buffer(memoryview(buffer)[offset:]):
+            return board
+        raise ValueError("No board in buffer")
+
+    @classmethod
+    def iter_from_buffer(cls, buffer) -> Iterator["Board"]:
+        """Read boards written back to back by ``to_bytes`` until the buffer ends."""
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(view):
+            count = view[offset]
+            sizes = view[offset + 1 : offset + 1 + count]
+            if len(sizes) < count:
+                raise ValueError("Truncated board")
+            offset += 1 + count
+            hands = []
+            for size in sizes:
+                ids = view[offset : offset + size]
+                if len(ids) < size:
+                    raise ValueError("Truncated board")
+                hands.append(Hand(_cards_from_ids(ids)))
+                offset += size
+            yield cls(hands)
+
+    def __reduce__(self):
+        return Board.from_buffer, (self.to_bytes(),)
+
+class Rng(random.Random):
+    """A ``random.Random`` that splits into independent, reproducible streams.
+
+    ``stream(index)`` plays the role of a jump-ahead: it returns a generator
+    seeded from this one's seed and ``index``. String seeds are hashed with
+    SHA-512, so streams are stable across processes and Python runs.
+    """
+
+    def seed(self, a=None, version=2) -> None:
+        if a is None:
+            a = int.from_bytes(os.urandom(8), "big")
+        self.root_seed = a
+        super().seed(a, version)
+
+    def stream(self, index: int) -> "Rng":
+        return Rng(f"{self.root_seed}/{index}")
+
+    def __reduce__(self):
+        return self.__class__, (self.root_seed,), self.getstate()
+
+
+FULL_MASK = (1 << 52) - 1
+DECK_BYTES = 54
+_DEAL_BLOCK = 1 << 14
+_DECK_POSITIONS = [0] * 52
+for _index, _card in enumerate(_DECK_ORDER):
+    _DECK_POSITIONS[_card.id] = _index
 
-        if shuffled:
-            self.shuffle()
+
+class Deck:
+    """A deck backed by a preallocated card array and a bitmask of its cards.
+
+    The cards still in the deck are ``_cards[:_size]``, the top of the deck
+    last; cards taken out are kept right above them, most recent first. A
+    shuffled deck doesn't shuffle up front: each draw swaps a random
+    remaining card to the top (one Fisher-Yates step), so only the cards
+    actually drawn get shuffled. ``rng`` can be any object with a
+    ``random()`` method, such as ``Rng``; without one the deck draws from
+    the ``random`` module.
+
+    ``jokers`` adds up to two ``JOKERS``, at the bottom of an unshuffled deck.
+    ``ranks`` keeps only the cards of those ranks, e.g. the 36-card short
+    deck without deuces to fives.
+    """
+
+    def __init__(self, shuffled: bool = True, rng=None, jokers: int = 0, ranks: Iterable[Rank] | None = None):
+        if not 0 <= jokers <= len(JOKERS):
+            raise ValueError(f"A deck has 0 to {len(JOKERS)} jokers, not {jokers}")
+        if ranks is not None:
+            ranks = tuple(sorted(set(ranks), key=lambda rank: rank.value))
+            if len(ranks) == len(RANKS):
+                ranks = None
+            elif len(ranks) < 2:
+                raise ValueError("A deck needs at least two ranks")
+        self.rng = rng
+        self.shuffled = shuffled
+        self.jokers = jokers
+        self.ranks = ranks
+        if jokers or ranks:
+            self._order = JOKERS[:jokers] + tuple(card for card in _DECK_ORDER if ranks is None or card.rank in ranks)
+            self._positions = [0] * (52 + jokers)
+            for index, card in enumerate(self._order):
+                self._positions[card.id] = index
+            self._full_mask = sum(1 << card.id for card in self._order)
+        else:
+            self._order, self._positions, self._full_mask = _DECK_ORDER, _DECK_POSITIONS, FULL_MASK
+        self._cards = list(self._order)
+        self._position = list(self._positions)
+        self._size = len(self._order)
+        self.mask = self._full_mask
+        self._lazy = shuffled
+
+    def reset(self) -> None:
+        """Put every card back, in place."""
+        self._cards[:] = self._order
+        self._position[:] = self._positions
+        self._size = len(self._order)
+        self.mask = self._full_mask
+        self._lazy = self.shuffled
 
     def shuffle(self) -> None:
-        random.shuffle(self.cards)
+        self._lazy = True
+
+    @property
+    def cards(self) -> list[Card]:
+        """The remaining cards, the next one to be drawn last."""
+        if self._lazy:
+            self._lazy = False
+            cards, position = self._cards, self._position
+            rng = self.rng if self.rng is not None else random
+            for size in range(self._size, 1, -1):
+                index = int(rng.random() * size)
+                card = cards[index]
+                cards[index] = cards[size - 1]
+                cards[size - 1] = card
+                position[cards[index].id] = index
+                position[card.id] = size - 1
+        return self._cards[: self._size]
+
+    def remove(self, cards) -> None:
+        """Take specific cards out of the deck, O(1) per card for a shuffled deck."""
+        for card in cards:
+            if not self.mask >> card.id & 1:
+                raise ValueError(f"{card} is not in the deck")
+            self.mask ^= 1 << card.id
+            index = self._position[card.id]
+            self._size -= 1
+            if self._lazy:
+                last = self._cards[self._size]
+                self._cards[index] = last
+                self._position[last.id] = index
+                self._cards[self._size] = card
+            else:
+                del self._cards[index]
+                self._cards.insert(self._size, card)
+                for moved in range(index, self._size + 1):
+                    self._position[self._cards[moved].id] = moved
+            self._position[card.id] = self._size
+
+    def put_back(self, count: int) -> None:
+        """Return the last ``count`` cards drawn or removed to the top of the deck."""
+        if self._size + count > len(self._cards):
+            raise ValueError(f"Only {len(self._cards) - self._size} cards are out of the deck")
+        for card in self._cards[self._size : self._size + count]:
+            self.mask |= 1 << card.id
+        self._size += count
 
     def draw_card(self) -> Card:
-        return self.cards.pop()
+        return self.draw_cards(1)[0]
 
     def draw_cards(self, count: int = 1) -> list[Card]:
-        return [self.cards.pop() for _ in range(count)]
+        size = self._size
+        if count < 0:
+            raise ValueError(f"Can't draw {count} cards")
+        if count > size:
+            raise IndexError("draw from an empty deck")
+        cards, position = self._cards, self._position
+        rng = self.rng if self.rng is not None else random
+        drawn = []
+        mask = self.mask
+        for size in range(size - 1, size - count - 1, -1):
+            if self._lazy:
+                index = int(rng.random() * (size + 1))
+                card = cards[index]
+                cards[index] = cards[size]
+                cards[size] = card
+                position[cards[index].id] = index
+                position[card.id] = size
+            else:
+                card = cards[size]
+            mask ^= 1 << card.id
+            drawn.append(card)
+        self._size -= count
+        self.mask = mask
+        return drawn
+
+    def deal_many(self, count: int, shape: tuple[int, ...] = (5,), generator=None):
+        """Deal ``count`` independent deals of ``shape`` cards from this deck's remaining cards.
+
+        Returns an int8 array of card ids of shape ``(count, *shape)``, e.g.
+        ``deal_many(1000, (5, 5))`` for a thousand boards of five hands. Each
+        deal is duplicate-free and the deck itself is left untouched. Deals
+        come from sorting random keys, a block of deals at a time.
+        ``generator`` is a NumPy ``Generator``; by default one is seeded
+        from ``rng``. Requires NumPy.
+        """
+        import numpy as np
+
+        ids = np.array([card_id for card_id in range(52 + self.jokers) if self.mask >> card_id & 1], dtype=np.int8)
+        per_deal = int(np.prod(shape))
+        if per_deal > len(ids):
+            raise ValueError(f"Can't deal {per_deal} cards from {len(ids)}")
+        if generator is None:
+            rng = self.rng if self.rng is not None else random
+            generator = np.random.default_rng(int(rng.random() * 2**53))
+        deals = np.empty((count, per_deal), dtype=np.int8)
+        for start in range(0, count, _DEAL_BLOCK):
+            keys = generator.random((min(_DEAL_BLOCK, count - start), len(ids)), dtype=np.float32)
+            order = np.argsort(keys, axis=1)[:, :per_deal]
+            deals[start : start + len(keys)] = ids[order]
+        return deals.reshape(count, *shape)
+
+    def to_bytes(self) -> bytes:
+        """A snapshot: flags, the number of cards left, then the card array.
+
+        A full deck takes ``DECK_BYTES``, plus one byte per joker. A deck of
+        fewer ranks stores their rank mask in two bytes after the flags, and
+        one byte per card it holds. The snapshot restores the exact deck,
+        including the cards ``put_back`` can return and a shuffle still
+        pending. The ``rng`` isn't included.
+        """
+        flags = self.shuffled | self._lazy << 1 | self.jokers << 2 | (self.ranks is not None) << 4
+        header = [flags]
+        if self.ranks is not None:
+            header += sum(1 << _RANK_INDEX[rank] for rank in self.ranks).to_bytes(2, "little")
+        return bytes([*header, self._size, *[card.id for card in self._cards]])
+
+    @classmethod
+    def from_buffer(cls, buffer, offset: int = 0, rng=None) -> "Deck":
+        """Restore a deck saved by ``to_bytes`` at ``offset``, drawing with ``rng`` from now on."""
+        view = memoryview(buffer)[offset:]
+        if len(view) < 3:
+            raise ValueError("Truncated deck")
+        flags = view[0]
+        jokers = flags >> 2 & 3
+        ranks = None
+        if flags & 0x10:
+            rank_mask = int.from_bytes(view[1:3], "little")
+            ranks = [rank for rank in RANKS if rank_mask >> _RANK_INDEX[rank] & 1]
+            view = view[2:]
+        if jokers > len(JOKERS) or flags >> 5:
+            raise ValueError("Not a deck snapshot")
+        deck = cls(shuffled=bool(flags & 1), rng=rng, jokers=jokers, ranks=ranks)
+        view = view[: 2 + len(deck._cards)]
+        if len(view) < 2 + len(deck._cards):
+            raise ValueError("Truncated deck")
+        cards = _cards_from_ids(view[2:])
+        if set(cards) != set(deck._cards) or view[1] > len(cards):
+            raise ValueError("Not a deck snapshot")
+        deck._cards = cards
+        for index, card in enumerate(cards):
+            deck._position[card.id] = index
+        deck._size = view[1]
+        deck.mask = 0
+        for card in cards[: deck._size]:
+            deck.mask |= 1 << card.id
+        deck._lazy = bool(flags & 2)
+        return deck
+
+    def __reduce__(self):
+        # The rng travels with the snapshot: an ``Rng`` keeps its state, so a
+        # copy deals what the original would have; no rng stays the module's.
+        return Deck.from_buffer, (self.to_bytes(), 0, self.rng)
+
+    def __contains__(self, card: Card) -> bool:
+        return bool(self.mask >> card.id & 1)
+
+    def __len__(self) -> int:
+        return self._size
 
     def __str__(self):
         card_strs = [str(card) for card in self.cards]
@@ -147,6 +683,204 @@ class Deck:
             lines.append(line)
         return ",\n".join(lines)
 
+def test_cards_are_interned():
+    """Test that constructing a card returns the shared instance."""
+    card = Card(Suit.SPADES, Rank.TEN)
+    assert card is Card(Suit.SPADES, Rank.TEN)
+    assert card is Card.from_id(card.id)
+    assert len(set(Deck(shuffled=False).cards)) == 52
+
+
+def test_card_fields():
+    """Test the precomputed id, prime and bit fields."""
+    card = Card(Suit.DIAMONDS, Rank.ACE)
+    assert card.id == 49
+    assert card.prime == 41
+    assert card.rank_bit == 1 << 12
+    assert card.suit_bit == 1 << 1
+
+
+def test_deck_remove_and_draw():
+    """Test that removed and drawn cards leave the deck exactly once."""
+    deck = Deck(rng=Rng(3))
+    dead = [Card.from_str("A♥"), Card.from_str("2♣")]
+    deck.remove(dead)
+    drawn = deck.draw_cards(50)
+    assert len(deck) == 0
+    assert set(drawn) == set(CARDS) - set(dead)
+    deck.put_back(5)
+    assert set(deck.draw_cards(5)) == set(drawn[-5:])
+    deck.reset()
+    assert len(deck) == 52 and deck.mask == FULL_MASK
+
+
+def test_unshuffled_deck_order():
+    """Test that an unshuffled deck keeps its order through removals."""
+    deck = Deck(shuffled=False)
+    top = deck.cards[-1]
+    deck.remove([Card(Suit.HEARTS, Rank.KING)])
+    assert Card(Suit.HEARTS, Rank.KING) not in deck
+    assert deck.draw_card() is top
+    assert deck.cards == [card for card in _DECK_ORDER if card.rank != Rank.KING or card.suit != Suit.HEARTS][:-1]
+
+
+def test_rng_streams_are_reproducible():
+    """Test that streams depend only on the seed and their index."""
+    assert Rng(5).stream(1).random() == Rng(5).stream(1).random()
+    assert Rng(5).stream(1).random() != Rng(5).stream(2).random()
+    deals = [Deck(rng=Rng(9)).draw_cards(5) for _ in range(2)]
+    assert deals[0] == deals[1]
+
+
+def test_deal_many():
+    """Test that bulk deals are duplicate-free and skip removed cards."""
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    deck = Deck(rng=Rng(1))
+    deck.remove([Card.from_str("A♠")])
+    deals = deck.deal_many(3000, (5, 5))
+    assert deals.shape == (3000, 5, 5)
+    flat = deals.reshape(3000, 25)
+    assert all(len(set(deal)) == 25 for deal in flat.tolist())
+    assert not (flat == Card.from_str("A♠").id).any()
+    counts = np.delete(np.bincount(flat.ravel(), minlength=52), Card.from_str("A♠").id)
+    assert counts.max() < 1.2 * counts.min()
+    assert len(deck) == 51
+
+
+def test_random_hands_have_no_duplicates():
+    """Test that a random board never repeats a card."""
+    cards = [card for hand in Board.random().hands for card in hand]
+    assert len(set(cards)) == 25
+
+
+def test_card_from_str():
+    """Test parsing both the display notation and ASCII aliases."""
+    for text in ["10♠", "Ts", "10s", "tS"]:
+        assert Card.from_str(text) is Card(Suit.SPADES, Rank.TEN)
+    assert all(Card.from_str(str(card)) is card for card in CARDS)
+
+
+def test_hand_and_board_from_str():
+    """Test parsing hands and boards, and that their ``str`` output reads back."""
+    hand = Hand.from_str("A♥ Kd 10♠ *")
+    assert hand.cards == [Card.from_str("Ah"), Card.from_str("K♦"), Card.from_str("Ts"), JOKERS[0]]
+    assert Hand.from_str(str(hand)).cards == hand.cards
+    assert len(Hand.from_str("")) == len(Hand.from_str(str(Hand()))) == 0
+    board = Board.from_str("A♥ A♦ / 7♣ / ")
+    assert [len(row) for row in board.hands] == [2, 1, 0]
+    assert str(Board.from_str(str(board))) == str(board)
+
+
+def test_hand_and_board_bytes_roundtrip():
+    """Test the one-byte-per-card codec, masks and compact pickles."""
+    import pickle
+
+    hand = Hand.from_str("Ah 2c Ts Kd")
+    data = hand.to_bytes()
+    assert data == bytes([48, 2, 35, 45])
+    assert Hand.from_buffer(bytearray(b"xx" + data), offset=2).cards == hand.cards
+    assert Hand.from_buffer(memoryview(data), count=2).cards == hand.cards[:2]
+    assert Hand.from_mask(hand.mask).mask == hand.mask
+    boards = [Board.random(), Board([Hand(), hand])]
+    buffer = b"".join(board.to_bytes() for board in boards)
+    restored = list(Board.iter_from_buffer(buffer))
+    assert [[hand.cards for hand in board.hands] for board in restored] == [[hand.cards for hand in board.hands] for board in boards]
+    assert pickle.loads(pickle.dumps(boards[0])).hands[0].cards == boards[0].hands[0].cards
+    assert len(pickle.dumps(hand)) < 100
+    for bad in [bytes([54]), b"\x05\x05\x01"]:
+        try:
+            Board.from_buffer(bad) if len(bad) > 1 else Hand.from_buffer(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} was accepted")
+
+
+def test_deck_bytes_roundtrip():
+    """Test that a restored deck deals exactly like the original."""
+    deck = Deck(rng=Rng(3))
+    deck.draw_cards(7)
+    deck.remove([card for card in CARDS[:3] if card in deck])
+    data = deck.to_bytes()
+    assert len(data) == DECK_BYTES
+    copy = Deck.from_buffer(bytearray(data), rng=Rng(9))
+    deck.rng = Rng(9)
+    assert copy.mask == deck.mask and len(copy) == len(deck)
+    assert copy.draw_cards(10) == deck.draw_cards(10)
+    copy.put_back(12)
+    deck.put_back(12)
+    assert copy.cards == deck.cards
+
+
+def test_default_deck_pickles_and_rejects_negative_draws():
+    """Test that a deck without an rng pickles, and that a negative draw leaves it intact."""
+    import copy
+    import pickle
+
+    deck = Deck()
+    deck.draw_cards(3)
+    for clone in (pickle.loads(pickle.dumps(deck)), copy.deepcopy(deck)):
+        assert clone.to_bytes() == deck.to_bytes() and len(clone.draw_cards(49)) == 49
+    try:
+        deck.draw_cards(-2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("draw_cards(-2) was accepted")
+    assert len(deck) == 49 and deck.mask.bit_count() == 49
+
+
+def test_deck_pickles_as_snapshot():
+    """Test that a pickled deck is its compact snapshot and keeps dealing like the original."""
+    import pickle
+
+    assert len(pickle.dumps(Deck())) < DECK_BYTES + 100
+    deck = Deck(rng=Rng(5))
+    deck.draw_cards(4)
+    copy = pickle.loads(pickle.dumps(deck))
+    assert copy.to_bytes() == deck.to_bytes()
+    assert copy.draw_cards(10) == deck.draw_cards(10)
+
+
+def test_jokers():
+    """Test jokers in hands, decks and their codecs."""
+    hand = Hand([Card.from_str("Ah"), JOKERS[1], Card.from_str("*")])
+    assert hand.wilds == 2 and hand.prime_product == 41 and hand.kinds[1] == 1
+    assert hand.pop_card() is JOKERS[0] and hand.wilds == 1
+    assert Hand.from_mask(hand.mask).cards == [hand.cards[0], JOKERS[1]]
+    assert all(Card.from_str(str(joker)) is joker is Card.from_id(joker.id) for joker in JOKERS)
+    deck = Deck(shuffled=False, jokers=2)
+    assert len(deck) == 54 and deck.cards[:2] == list(JOKERS)
+    deck = Deck(rng=Rng(4), jokers=1)
+    drawn = deck.draw_cards(53)
+    assert set(drawn) == set(CARDS) | {JOKERS[0]}
+    deck.put_back(20)
+    copy = Deck.from_buffer(deck.to_bytes(), rng=Rng(1))
+    assert len(deck.to_bytes()) == DECK_BYTES + 1
+    assert copy.jokers == 1 and copy.mask == deck.mask and copy.to_bytes() == deck.to_bytes()
+    deck.reset()
+    assert len(deck) == 53 and JOKERS[0] in deck
+
+
+def test_deck_ranks():
+    """Test a deck of fewer ranks, its draws and its snapshot."""
+    short = [rank for rank in RANKS if rank.value >= 6]
+    deck = Deck(rng=Rng(2), ranks=short)
+    assert len(deck) == 36 and deck.mask.bit_count() == 36
+    drawn = deck.draw_cards(30)
+    assert all(card.rank in short for card in drawn)
+    data = deck.to_bytes()
+    assert len(data) == 4 + 36
+    copy = Deck.from_buffer(data, rng=Rng(5))
+    assert copy.ranks == deck.ranks and copy.to_bytes() == data
+    deck.put_back(30)
+    assert len(deck) == 36
+    assert Deck(ranks=RANKS).ranks is None
+
+
 if __name__ == "__main__":
     #hand = Hand.random()
     board = Board.random(5)
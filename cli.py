@@ -3,10 +3,12 @@
 Simple CLI Game Template
 A minimalistic template for building command-line games in Python.
 """
-from game import Deck
-
+import os
 import sys
 
+# Cold-start budget for ``import game`` (which includes ``card``), in ms.
+IMPORT_BUDGET_MS = 40
+
 
 class Game:
     """Base game class with core game loop functionality."""
@@ -50,16 +52,29 @@ class Game:
             print("Invalid choice. Please try again.")
             
     def play(self):
-        """Main game logic - override in subclasses."""
+        """Play one game against a bot, at the terminal."""
+        import asyncio
+
+        from engine import BotPlayer, Engine, RemotePlayer, StdioTransport
+
         print("\nGame started!")
-        print("This is a template - implement your game logic here.")
-        print("Game ended. Score: 0")
+        try:
+            scores = asyncio.run(Engine().play_table([RemotePlayer(StdioTransport()), BotPlayer()]))
+        except (ConnectionError, KeyboardInterrupt):
+            print("\n\nGame interrupted. Goodbye!")
+            sys.exit(0)
+        self.score += scores.points[0]
+        print(f"Game ended. Score: {self.score}")
         
     def show_instructions(self):
         """Display game instructions."""
         print("\n--- Instructions ---")
-        print("This is a template game.")
-        print("Implement your game rules here.")
+        print("You and a bot each build five poker hands, one card at a time.")
+        print("Each turn you draw a card and put it in one of your rows; a row")
+        print("only takes its next card once all your rows have caught up with it.")
+        print("When every row holds five cards, each row is compared with the")
+        print("bot's row: the better hand wins a point, and winning all five")
+        print("rows earns a bonus.")
         print()
         
     def quit(self):
@@ -77,12 +92,190 @@ class Game:
             self.handle_menu_choice(choice)
 
 
-def main():
+def import_profile(statement: str, runs: int = 3) -> dict[str, tuple[int, int]]:
+    """Time the imports of ``statement`` in fresh interpreters with ``-X importtime``.
+
+    Returns ``{module: (self_us, cumulative_us)}`` for top-level imports, the
+    best of ``runs`` runs after a warm-up run that writes the bytecode cache.
+    """
+    import subprocess
+
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    command = [sys.executable, "-X", "importtime", "-c", statement]
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run(command, cwd=here, env=env, capture_output=True, check=True)
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run(command, cwd=here, env=env, capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            if name.startswith("  "):
+                continue
+            timing = (int(self_us), int(cumulative_us))
+            name = name.strip()
+            best[name] = min(best.get(name, timing), timing, key=lambda pair: pair[1])
+    return best
+
+
+def print_startup_profile() -> None:
+    """Report what ``python cli.py`` spends on imports, and what is deferred."""
+    cold = import_profile("import cli")
+    total = sum(cumulative for _, cumulative in cold.values())
+    print(f"Cold start (import cli): {total / 1000:.1f} ms")
+    print(f"  {'module':<28}{'self ms':>10}{'total ms':>10}")
+    for name, (self_us, cumulative_us) in sorted(cold.items(), key=lambda item: -item[1][1])[:15]:
+        print(f"  {name:<28}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+    print("Deferred until first use:")
+    for module in ("strength", "equity", "numpy"):
+        try:
+            _, cumulative_us = import_profile(f"import cli, {module}", runs=1)[module]
+        except Exception:
+            print(f"  {module:<28}{'unavailable':>20}")
+            continue
+        print(f"  {module:<28}{'':>10}{cumulative_us / 1000:>10.1f}")
+
+
+def parse_args(argv: list[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play the card game.")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="report the import-time breakdown of starting the CLI and exit",
+    )
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="host games over TCP, every connection against a bot")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=7777)
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes to run bot moves and scoring in (default: one per core; 0 runs them on the event loop)",
+    )
+    simulate = commands.add_parser("simulate", help="play bot games without a terminal and report games/sec")
+    simulate.add_argument("--games", type=int, default=1000)
+    simulate.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    simulate.add_argument("--seed", type=int, default=None)
+    simulate.add_argument("--policies", default="greedy,random", help="comma-separated policy per seat")
+    simulate.add_argument("--output", help="write every game as a compact binary record to this file")
+    return parser.parse_args(argv)
+
+
+def run_simulation(args) -> None:
+    from simulate import simulate
+
+    policies = args.policies.split(",")
+    try:
+        if args.output:
+            with open(args.output, "wb") as output:
+                result = simulate(args.games, policies, args.workers, args.seed, output)
+        else:
+            result = simulate(args.games, policies, args.workers, args.seed)
+    except ValueError as error:
+        sys.exit(f"simulate: error: {error}")
+    print(f"{result.games:,} games in {result.seconds:.2f}s ({result.games_per_second:,.0f} games/sec)")
+    for seat, name in enumerate(result.policies):
+        print(f"  seat {seat + 1} {name:<10} wins {result.wins[seat] / result.games:>7.1%}  points/game {result.points[seat] / result.games:+.3f}")
+
+
+def serve(host: str, port: int, workers: int | None = None) -> None:
+    """Host games until interrupted.
+
+    Bot moves and scoring run in ``workers`` processes (one per core by
+    default) so a slow move never stalls the other tables; with 0 they run
+    on the event loop, which saves pickling every board but serializes all
+    tables behind each move.
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    from engine import Engine
+
+    async def run():
+        executor = ProcessPoolExecutor(workers) if workers != 0 else None
+        server = await Engine(executor=executor).serve(host, port)
+        print(f"Serving on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: list[str] | None = None):
     """Entry point for the game."""
+    argv = sys.argv[1:] if argv is None else argv
+    # argparse alone costs more to import than the game, so skip it when there is nothing to parse.
+    args = parse_args(argv) if argv else None
+    if args and args.startup_profile:
+        print_startup_profile()
+        return
+    if args and args.command == "serve":
+        serve(args.host, args.port, args.workers)
+        return
+    if args and args.command == "simulate":
+        run_simulation(args)
+        return
+    if os.environ.get("CARDS_INSTRUMENT"):
+        import instrument
+
+        # Run as a script this module is ``__main__``; instrument the Game that actually runs.
+        instrument.enable_from_env(owners={("cli", "Game"): Game})
     game = Game()
     game.run()
 
 
+def test_instrumented_game_counts_play():
+    """Test that one game played by ``python cli.py`` is counted under ``game.play``."""
+    import json
+    import subprocess
+    import tempfile
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.json")
+        subprocess.run(
+            [sys.executable, "cli.py"],
+            cwd=here,
+            env={**os.environ, "CARDS_INSTRUMENT": f"json:{path}"},
+            input="1\n" + "1\n2\n3\n4\n5\n" * 5 + "3\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        with open(path) as file:
+            timers = json.load(file)["timers"]
+    assert timers["game.play"]["calls"] == 1
+    assert timers["deck.draw_cards"]["calls"] == 50
+
+
+def test_simulate_reports_bad_seats():
+    """Test that ``simulate`` with more seats than a deck can fill exits with a message, not a traceback."""
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "cli.py", "simulate", "--games", "10", "--policies", "greedy,random,first"],
+        cwd=here,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert result.stderr.startswith("simulate: error: 3 players") and "Traceback" not in result.stderr
+
+
+def test_import_time_budget():
+    """Test that importing card and game stays within the cold-start budget."""
+    timings = import_profile("import game")
+    assert "strength" not in timings and "numpy" not in timings
+    assert timings["game"][1] / 1000 < IMPORT_BUDGET_MS
+
+
 if __name__ == "__main__":
-    deck = Deck()
-    print(deck)
+    main()
@@ -0,0 +1,367 @@
+"""An asyncio engine that hosts many games in one process.
+
+The game: every player builds a board of five rows. Each turn a player is
+dealt one card from the shared deck and places it in one of their rows; a
+row can only take its next card once every other row has caught up with
+it. When every row holds five cards the boards are scored against each
+other with ``scoring``.
+
+``Table`` holds the rules and state of one game and knows nothing about
+I/O. ``Engine.play_table`` runs a table with ``Player``s: a ``BotPlayer``
+follows a policy function, a ``RemotePlayer`` is asked over a
+``Transport`` (stdin/stdout, a socket stream, or a scripted stand-in for
+tests). A table only waits on its own players, so one event loop serves
+as many tables as it has players to wait for; ``Engine.serve`` seats each
+socket connection at its own table against a bot. Policies and scoring can
+be handed to an executor so they never stall the loop.
+"""
+import asyncio
+import random
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from types import FunctionType
+from typing import Callable, Iterable, Optional
+
+from card import Board, Card, Deck, Hand, Rng
+from scoring import Scorer, Scores, score
+
+ROWS = 5
+ROW_SIZE = 5
+
+# A policy picks the row to place ``card`` in: policy(board, card, open_rows) -> row.
+Policy = Callable[[Board, Card, list[int]], int]
+
+
+class Table:
+    """The state of one game: the deck and every player's board."""
+
+    def __init__(self, players: int = 2, rng=None, rows: int = ROWS, row_size: int = ROW_SIZE):
+        if players * rows * row_size > 52:
+            raise ValueError(f"{players} players can't fill {rows} rows of {row_size} from one deck")
+        self.deck = Deck(rng=rng)
+        self.boards = [Board([Hand() for _ in range(rows)]) for _ in range(players)]
+        self.row_size = row_size
+        self.turn = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.turn == len(self.boards) * len(self.boards[0].hands) * self.row_size
+
+    @property
+    def seat(self) -> int:
+        """Whose turn it is."""
+        return self.turn % len(self.boards)
+
+    def deal(self) -> Card:
+        return self.deck.draw_card()
+
+    def open_rows(self, seat: int) -> list[int]:
+        """The rows of ``seat``'s board that may take the next card."""
+        return open_rows(self.boards[seat], self.row_size)
+
+    def place(self, card: Card, row: int) -> None:
+        """Place the card dealt to the player whose turn it is and pass the turn."""
+        if row not in self.open_rows(self.seat):
+            raise ValueError(f"Row {row} can't take a card now")
+        self.boards[self.seat].add_card(card, row)
+        self.turn += 1
+
+
+def open_rows(board: Board, row_size: int = ROW_SIZE) -> list[int]:
+    """The shortest rows of ``board``, which are the ones that may take a card."""
+    sizes = [len(hand) for hand in board.hands]
+    shortest = min(sizes)
+    if shortest >= row_size:
+        return []
+    return [row for row, size in enumerate(sizes) if size == shortest]
+
+
+def play_game(policies: list[Policy], rng=None, scorer: Optional[Scorer] = None) -> tuple[Table, Scores]:
+    """Play a whole game between policies, without the event loop."""
+    table = Table(len(policies), rng=rng)
+    while not table.finished:
+        seat = table.seat
+        card = table.deal()
+        table.place(card, policies[seat](table.boards[seat], card, table.open_rows(seat)))
+    return table, scorer.score(table.boards) if scorer else score(table.boards)
+
+
+def first_open_row(board: Board, card: Card, rows: list[int]) -> int:
+    return rows[0]
+
+
+class RandomPolicy:
+    """Places every card in a random open row."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def __call__(self, board: Board, card: Card, rows: list[int]) -> int:
+        return self.rng.choice(rows)
+
+
+def greedy_row(board: Board, card: Card, rows: list[int]) -> int:
+    """The open row whose best reachable category gains the most from ``card``."""
+    from strength import HandStrengthEvaluation
+
+    best_row, best_gain = rows[0], None
+    for row in rows:
+        hand = board.hands[row]
+        before = HandStrengthEvaluation(hand).potential_category()
+        hand.add_card(card)
+        gain = (HandStrengthEvaluation(hand).potential_category() - before, before)
+        hand.pop_card()
+        if best_gain is None or gain > best_gain:
+            best_row, best_gain = row, gain
+    return best_row
+
+
+def board_text(board: Board) -> str:
+    return "\n".join(f"{row + 1}: {hand}" for row, hand in enumerate(board.hands))
+
+
+class Transport:
+    """Carries lines of text between the engine and a player."""
+
+    async def send(self, text: str) -> None:
+        raise NotImplementedError
+
+    async def receive(self) -> str:
+        """The player's next line; raises ConnectionError once the player is gone."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class StdioTransport(Transport):
+    """The terminal. Reading happens in a thread so the loop keeps running."""
+
+    async def send(self, text: str) -> None:
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+
+    async def receive(self) -> str:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            raise ConnectionError("stdin closed")
+        return line.strip()
+
+
+class StreamTransport(Transport):
+    """An asyncio stream pair, e.g. a socket from ``asyncio.start_server``."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, text: str) -> None:
+        self.writer.write((text + "\n").encode())
+        await self.writer.drain()
+
+    async def receive(self) -> str:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed")
+        return line.decode().strip()
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class ScriptedTransport(Transport):
+    """A stand-in client that answers with prepared replies and records what it was sent."""
+
+    def __init__(self, replies: Iterable[str]):
+        self.replies = iter(replies)
+        self.sent: list[str] = []
+
+    async def send(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def receive(self) -> str:
+        try:
+            return next(self.replies)
+        except StopIteration:
+            raise ConnectionError("script finished") from None
+
+
+class Player:
+    name = "player"
+
+    async def choose_row(self, board: Board, card: Card, rows: list[int]) -> int:
+        raise NotImplementedError
+
+    async def game_over(self, boards: list[Board], scores: Scores, seat: int) -> None:
+        pass
+
+
+class BotPlayer(Player):
+    """Plays a policy, in ``executor`` if one is given.
+
+    A process executor gets a pickled copy of the policy on every call, so
+    a policy object that keeps state between moves (``RandomPolicy``'s
+    generator, a search's tables) would start from the same state every
+    time. Only plain functions are sent to a process executor; other
+    policies run on the event loop.
+    """
+
+    def __init__(self, policy: Policy = greedy_row, executor: Optional[Executor] = None, name: str = "bot"):
+        self.policy = policy
+        if isinstance(executor, ProcessPoolExecutor) and not isinstance(policy, FunctionType):
+            executor = None
+        self.executor = executor
+        self.name = name
+
+    async def choose_row(self, board: Board, card: Card, rows: list[int]) -> int:
+        if self.executor is None:
+            return self.policy(board, card, rows)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.policy, board, card, rows)
+
+
+class RemotePlayer(Player):
+    """Asks a person, or a client program, over a ``Transport``.
+
+    The player sees their board and the card, and answers with a row
+    number counted from 1.
+    """
+
+    def __init__(self, transport: Transport, name: str = "you"):
+        self.transport = transport
+        self.name = name
+
+    async def choose_row(self, board: Board, card: Card, rows: list[int]) -> int:
+        choices = ", ".join(str(row + 1) for row in rows)
+        await self.transport.send(f"\n{board_text(board)}\nYou drew {card}. Row ({choices}):")
+        while True:
+            reply = await self.transport.receive()
+            if reply.isdigit() and int(reply) - 1 in rows:
+                return int(reply) - 1
+            await self.transport.send(f"Choose one of {choices}:")
+
+    async def game_over(self, boards: list[Board], scores: Scores, seat: int) -> None:
+        lines = ["", "Final boards:"]
+        for row in range(len(boards[seat].hands)):
+            winner = scores.row_winners[row]
+            result = "tie" if winner is None else "won" if winner == seat else "lost"
+            hands = "  vs  ".join(str(board.hands[row]) for board in boards)
+            lines.append(f"{row + 1}: {hands}  ({result})")
+        lines.append(f"Points: {scores.points[seat]:+d}")
+        await self.transport.send("\n".join(lines))
+
+
+class Engine:
+    """Runs tables; ``executor`` takes scoring off the event loop."""
+
+    def __init__(self, scorer: Optional[Scorer] = None, executor: Optional[Executor] = None):
+        self.scorer = scorer or Scorer()
+        self.executor = executor
+        self.active_tables = 0
+
+    async def play_table(self, players: list[Player], rng=None) -> Scores:
+        table = Table(len(players), rng=rng)
+        self.active_tables += 1
+        try:
+            while not table.finished:
+                seat = table.seat
+                card = table.deal()
+                board = table.boards[seat]
+                table.place(card, await players[seat].choose_row(board, card, table.open_rows(seat)))
+                if seat == len(players) - 1:
+                    # Let other tables run between rounds even when every player here is an inline bot.
+                    await asyncio.sleep(0)
+            scores = await self._score(table.boards)
+        finally:
+            self.active_tables -= 1
+        for seat, player in enumerate(players):
+            await player.game_over(table.boards, scores, seat)
+        return scores
+
+    async def _score(self, boards: list[Board]) -> Scores:
+        if self.executor is None:
+            return self.scorer.score(boards)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.scorer.score, boards)
+
+    async def play_tables(self, tables: Iterable[list[Player]], seed=None) -> list[Scores]:
+        """Play tables concurrently, each dealing from its own stream of ``Rng(seed)``."""
+        rng = Rng(seed)
+        return await asyncio.gather(*(self.play_table(players, rng.stream(index)) for index, players in enumerate(tables)))
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0, policy: Policy = greedy_row) -> asyncio.AbstractServer:
+        """Seat every connection at its own table against a bot playing ``policy``."""
+
+        async def connected(reader, writer):
+            transport = StreamTransport(reader, writer)
+            try:
+                await self.play_table([RemotePlayer(transport), BotPlayer(policy, self.executor)])
+            except ConnectionError:
+                pass
+            finally:
+                await transport.close()
+
+        return await asyncio.start_server(connected, host, port)
+
+
+def test_scripted_table():
+    """Test a full game against a scripted client, including a rejected reply."""
+    replies = ["9", "x"] + [str(row) for _ in range(ROW_SIZE) for row in range(1, ROWS + 1)]
+    transport = ScriptedTransport(replies)
+    scores = asyncio.run(Engine().play_table([RemotePlayer(transport), BotPlayer(first_open_row)], Rng(1)))
+    assert sum(scores.points) == 0
+    assert transport.sent[1] == transport.sent[2] == "Choose one of 1, 2, 3, 4, 5:"
+    assert sum("You drew" in text for text in transport.sent) == ROWS * ROW_SIZE
+    assert transport.sent[-1].endswith(f"Points: {scores.points[0]:+d}")
+
+
+def test_many_tables_are_reproducible():
+    """Test hundreds of concurrent bot tables with a seed."""
+    engine = Engine()
+
+    def tables():
+        return [[BotPlayer(greedy_row), BotPlayer(RandomPolicy(index))] for index in range(200)]
+
+    first = asyncio.run(engine.play_tables(tables(), seed=4))
+    assert len(first) == 200 and engine.active_tables == 0
+    assert [scores.points for scores in first] == [scores.points for scores in asyncio.run(engine.play_tables(tables(), seed=4))]
+    assert sum(scores.points[0] for scores in first) > 0
+
+
+def test_stateful_policy_stays_out_of_process_executor():
+    """Test that a stateful policy keeps its state when given a process executor."""
+    board = Board([Hand() for _ in range(ROWS)])
+    card = Card.from_str("A♥")
+    with ProcessPoolExecutor(1) as executor:
+        bot = BotPlayer(RandomPolicy(3), executor)
+        assert bot.executor is None
+        assert BotPlayer(greedy_row, executor).executor is executor
+        choices = [asyncio.run(bot.choose_row(board, card, list(range(ROWS)))) for _ in range(20)]
+    reference = RandomPolicy(3)
+    assert choices == [reference(board, card, list(range(ROWS))) for _ in range(20)]
+
+
+def test_serve_over_socket():
+    """Test a client playing a whole game over a local socket."""
+
+    async def client(port: int) -> str:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        text = ""
+        while True:
+            line = (await reader.readline()).decode()
+            if not line:
+                break
+            text += line
+            if line.startswith("You drew"):
+                writer.write(line.split("(")[1].split(",")[0].rstrip("):\n").encode() + b"\n")
+        writer.close()
+        return text
+
+    async def session() -> str:
+        server = await Engine().serve(port=0, policy=first_open_row)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await client(port)
+
+    text = asyncio.run(session())
+    assert text.count("You drew") == ROWS * ROW_SIZE
+    assert "Points:" in text
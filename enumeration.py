@@ -0,0 +1,158 @@
+"""Exact statistics over every possible hand.
+
+All C(52, 5) = 2,598,960 five-card hands are generated as blocks of card
+ids in lexicographic order, one block per lowest card: the block for card
+``a`` is ``a`` followed by every 4-combination of the higher cards, which
+is a suffix of the lexicographic table of 4-combinations built once. Each
+block goes straight to ``strength.evaluate_batch``, so the full run takes
+well under a second and never holds more than one block.
+
+The resulting tables count hands per rank and per ``Category``, and give
+the percentile of any rank. ``self_check`` compares them with the known
+frequencies, which verifies the evaluator tables end to end. Requires
+NumPy.
+"""
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from strength import WORST_RANK, Category
+
+# Five-card hands per category, HIGH_CARD first.
+CATEGORY_COUNTS = (1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40)
+
+
+def combinations_array(n: int, k: int):
+    """Every k-combination of ``range(n)`` as rows of an int8 array, in lexicographic order."""
+    import numpy as np
+
+    if k == 1:
+        return np.arange(n, dtype=np.int8)[:, None]
+    tails = combinations_array(n, k - 1)
+    blocks = []
+    for first in range(n - k + 1):
+        rest = tails[np.searchsorted(tails[:, 0], first + 1) :]
+        block = np.empty((len(rest), k), dtype=np.int8)
+        block[:, 0] = first
+        block[:, 1:] = rest
+        blocks.append(block)
+    return np.concatenate(blocks)
+
+
+def iter_hands(size: int = 5) -> Iterator["np.ndarray"]:
+    """Every hand of ``size`` card ids, one block per lowest card."""
+    import numpy as np
+
+    tails = combinations_array(52, size - 1)
+    for first in range(52 - size + 1):
+        rest = tails[np.searchsorted(tails[:, 0], first + 1) :]
+        block = np.empty((len(rest), size), dtype=np.int8)
+        block[:, 0] = first
+        block[:, 1:] = rest
+        yield block
+
+
+@dataclass
+class HandTables:
+    """Hands counted per rank and per category."""
+
+    hands: int
+    rank_counts: "np.ndarray"
+    category_counts: "np.ndarray"
+
+    def frequencies(self) -> dict[Category, float]:
+        return {category: int(count) / self.hands for category, count in zip(Category, self.category_counts)}
+
+    def cumulative(self) -> "np.ndarray":
+        """``cumulative()[rank]`` is the share of hands at least as strong as ``rank``."""
+        return self.rank_counts.cumsum() / self.hands
+
+    def percentile(self, rank: int) -> float:
+        """The share of hands that a hand of ``rank`` beats."""
+        return 1.0 - float(self.rank_counts[: rank + 1].sum()) / self.hands
+
+
+def enumerate_hands(size: int = 5) -> HandTables:
+    """Evaluate every hand of ``size`` cards. Sizes 6 and 7 work but take minutes."""
+    import numpy as np
+
+    from strength import _numpy_tables, evaluate_batch
+
+    rank_counts = np.zeros(WORST_RANK + 1, dtype=np.int64)
+    hands = 0
+    for block in iter_hands(size):
+        ranks, _ = evaluate_batch(block)
+        rank_counts += np.bincount(ranks, minlength=WORST_RANK + 1)
+        hands += len(ranks)
+    category_counts = np.bincount(_numpy_tables()["category"], weights=rank_counts, minlength=len(Category))
+    return HandTables(hands, rank_counts, category_counts.astype(np.int64))
+
+
+_five_card_tables: Optional[HandTables] = None
+
+
+def five_card_tables() -> HandTables:
+    """The tables for all five-card hands, computed on first use."""
+    global _five_card_tables
+    if _five_card_tables is None:
+        _five_card_tables = enumerate_hands(5)
+    return _five_card_tables
+
+
+def hand_percentile(rank: int) -> float:
+    """The share of all five-card hands that a hand of ``rank`` beats."""
+    return five_card_tables().percentile(rank)
+
+
+def self_check(tables: Optional[HandTables] = None) -> None:
+    """Raise RuntimeError unless the five-card tables match the known frequencies."""
+    tables = tables or five_card_tables()
+    counts = tuple(int(count) for count in tables.category_counts)
+    if counts != CATEGORY_COUNTS:
+        raise RuntimeError(f"Evaluator self-check failed: category counts {counts}, expected {CATEGORY_COUNTS}")
+    if tables.rank_counts[0] or not tables.rank_counts[1:].all():
+        raise RuntimeError(f"Evaluator self-check failed: not every rank from 1 to {WORST_RANK} occurs")
+
+
+def main() -> int:
+    started = time.perf_counter()
+    tables = five_card_tables()
+    elapsed = time.perf_counter() - started
+    print(f"{tables.hands:,} hands in {elapsed:.2f}s")
+    print(f"{'category':<18}{'hands':>12}{'share':>12}")
+    for category, share in tables.frequencies().items():
+        print(f"{category.name:<18}{tables.category_counts[category]:>12,}{share:>12.4%}")
+    self_check(tables)
+    print("self-check passed")
+    return 0
+
+
+def test_combinations_array():
+    """Test the combination table against itertools."""
+    try:
+        import numpy
+    except ImportError:
+        return
+
+    from itertools import combinations
+
+    assert combinations_array(7, 3).tolist() == [list(combo) for combo in combinations(range(7), 3)]
+
+
+def test_five_card_frequencies():
+    """Test the exact category counts over all 2,598,960 hands."""
+    try:
+        import numpy
+    except ImportError:
+        return
+    tables = five_card_tables()
+    assert tables.hands == 2598960
+    self_check(tables)
+    assert hand_percentile(1) == 1 - 4 / 2598960
+    assert hand_percentile(WORST_RANK) == 0.0
+    assert abs(tables.cumulative()[WORST_RANK] - 1.0) < 1e-12
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""Monte Carlo equity of partial hands and boards.
+
+Unknown cards are dealt from the rest of the deck; each trial completes every
+hand to ``hand_size`` cards and compares them row by row. Trials are split
+into fixed-size chunks, each dealing from its own ``Rng`` stream derived from
+the seed, so results are reproducible and don't depend on the number of
+workers.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import combinations, permutations
+from typing import Iterable, Optional
+
+from card import CARDS, Board, Card, Deck, Hand, Rng
+from strength import evaluate5, evaluate_best
+
+CHUNK_TRIALS = 5000
+
+
+@dataclass
+class Equity:
+    """Win/tie/loss counts from the hero's point of view."""
+
+    wins: int = 0
+    ties: int = 0
+    losses: int = 0
+
+    @property
+    def trials(self) -> int:
+        return self.wins + self.ties + self.losses
+
+    @property
+    def equity(self) -> float:
+        """Share of the pot won on average, ties split evenly."""
+        return (self.wins + self.ties / 2) / self.trials if self.trials else 0.0
+
+    def __add__(self, other: "Equity") -> "Equity":
+        return Equity(self.wins + other.wins, self.ties + other.ties, self.losses + other.losses)
+
+
+@dataclass
+class BoardEquity:
+    """Per-row equities and the equity of winning more rows than the villain."""
+
+    rows: list[Equity] = field(default_factory=list)
+    board: Equity = field(default_factory=Equity)
+
+    def __add__(self, other: "BoardEquity") -> "BoardEquity":
+        rows = [mine + theirs for mine, theirs in zip(self.rows, other.rows)] if self.rows else other.rows
+        return BoardEquity(rows, self.board + other.board)
+
+
+def _remaining_cards(known: list[Card], variant=None) -> list[Card]:
+    if len(set(known)) != len(known):
+        raise ValueError("The same card is known more than once")
+    deck = variant.deck(shuffled=False) if variant is not None else Deck(shuffled=False)
+    deck.remove(known)
+    return deck.cards
+
+
+def _evaluator(hand_size: int, variant=None):
+    """``evaluate(*cards)`` for hands of ``hand_size`` cards, ranked by ``variant`` if given."""
+    if variant is not None:
+        evaluate = variant.tables().evaluate
+        return lambda *cards: evaluate(cards)
+    return evaluate5 if hand_size == 5 else lambda *cards: evaluate_best(cards)
+
+
+def _run_chunk(hero_rows, villain_rows, known, hand_size, trials, rng, variant=None) -> BoardEquity:
+    evaluate = _evaluator(hand_size, variant)
+    deck = variant.deck(rng=rng) if variant is not None else Deck(rng=rng)
+    deck.remove(known)
+    rows = [[0, 0, 0] for _ in hero_rows]
+    board = [0, 0, 0]
+    missing = [
+        (hand_size - len(hero), hand_size - len(villain))
+        for hero, villain in zip(hero_rows, villain_rows)
+    ]
+    needed = sum(hero + villain for hero, villain in missing)
+    for _ in range(trials):
+        drawn = deck.draw_cards(needed)
+        deck.put_back(needed)
+        position = 0
+        score = 0
+        for row, hero, villain, (hero_missing, villain_missing) in zip(rows, hero_rows, villain_rows, missing):
+            hero_rank = evaluate(*hero, *drawn[position : position + hero_missing])
+            position += hero_missing
+            villain_rank = evaluate(*villain, *drawn[position : position + villain_missing])
+            position += villain_missing
+            if hero_rank < villain_rank:
+                row[0] += 1
+                score += 1
+            elif hero_rank == villain_rank:
+                row[1] += 1
+            else:
+                row[2] += 1
+                score -= 1
+        board[0 if score > 0 else 1 if score == 0 else 2] += 1
+    return BoardEquity([Equity(*row) for row in rows], Equity(*board))
+
+
+def _check_deal(
+    hero_rows: list[list[Card]],
+    villain_rows: list[list[Card]],
+    dead: list[Card],
+    hand_size: int,
+    variant=None,
+) -> list[Card]:
+    """Validate a deal and return the cards left to complete it from."""
+    if not 5 <= hand_size <= 7:
+        raise ValueError(f"hand_size must be between 5 and 7, got {hand_size}")
+    if any(len(hand) > hand_size for hand in hero_rows + villain_rows):
+        raise ValueError(f"A hand already has more than {hand_size} cards")
+    in_hands = [card for hand in hero_rows + villain_rows for card in hand]
+    remaining = _remaining_cards(in_hands + dead, variant)
+    needed = hand_size * 2 * len(hero_rows) - len(in_hands)
+    if needed > len(remaining):
+        raise ValueError(f"Need {needed} unknown cards but only {len(remaining)} are left")
+    return remaining
+
+
+def _simulate(
+    hero_rows: list[list[Card]],
+    villain_rows: list[list[Card]],
+    dead: Iterable[Card],
+    trials: int,
+    workers: Optional[int],
+    seed: Optional[int],
+    hand_size: int,
+    variant=None,
+) -> BoardEquity:
+    dead = list(dead)
+    _check_deal(hero_rows, villain_rows, dead, hand_size, variant)
+    known = [card for hand in hero_rows + villain_rows for card in hand] + dead
+    rng = Rng(seed)
+    chunks = [
+        (hero_rows, villain_rows, known, hand_size, min(CHUNK_TRIALS, trials - start), rng.stream(index), variant)
+        for index, start in enumerate(range(0, trials, CHUNK_TRIALS))
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        results = [_run_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_chunk, *zip(*chunks)))
+
+    total = BoardEquity()
+    for result in results:
+        total += result
+    return total
+
+
+def hand_equity(
+    hero: Hand,
+    villain: Hand,
+    dead: Iterable[Card] = (),
+    trials: int = 10000,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    hand_size: int = 5,
+    variant=None,
+) -> Equity:
+    """Estimate how often ``hero`` beats ``villain`` once both are completed.
+
+    ``variant`` (see ``variants``) deals from its deck and ranks by its
+    rules instead of the standard ones.
+    """
+    return _simulate([list(hero)], [list(villain)], dead, trials, workers, seed, hand_size, variant).rows[0]
+
+
+def board_equity(
+    hero: Board,
+    villain: Board,
+    dead: Iterable[Card] = (),
+    trials: int = 10000,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    hand_size: int = 5,
+    variant=None,
+) -> BoardEquity:
+    """Estimate row-by-row equities of two boards once all their hands are completed."""
+    if len(hero.hands) != len(villain.hands):
+        raise ValueError("Boards must have the same number of hands")
+    hero_rows = [list(hand) for hand in hero.hands]
+    villain_rows = [list(hand) for hand in villain.hands]
+    return _simulate(hero_rows, villain_rows, dead, trials, workers, seed, hand_size, variant)
+
+
+_SUIT_PERMUTATIONS = list(permutations(range(4)))
+# For each suit permutation, the image of every suit mask (bit s set for suit s).
+_PERMUTED_MASKS = {
+    permutation: tuple(
+        sum(1 << permutation[suit] for suit in range(4) if mask >> suit & 1) for mask in range(16)
+    )
+    for permutation in _SUIT_PERMUTATIONS
+}
+_SUITS = [tuple(suit for suit in range(4) if mask >> suit & 1) for mask in range(16)]
+_SUBMASKS = [[submask for submask in range(1, 16) if submask & ~mask == 0] for mask in range(16)]
+
+
+def _permute(card_ids: Iterable[int], permutation: tuple[int, ...]) -> tuple[int, ...]:
+    return tuple(sorted(card_id & ~3 | permutation[card_id & 3] for card_id in card_ids))
+
+
+def _stabilizer(group: list[tuple[int, ...]], card_ids: Iterable[int]) -> list[tuple[int, ...]]:
+    """The suit permutations of ``group`` that map ``card_ids`` onto itself."""
+    card_ids = tuple(sorted(card_ids))
+    return [permutation for permutation in group if _permute(card_ids, permutation) == card_ids]
+
+
+def _orbits(remaining: list[int], size: int, group: list[tuple[int, ...]]):
+    """Yield one ``(combination, weight, stabilizer)`` per orbit of ``size``-card draws.
+
+    Two draws are in the same orbit when a suit permutation of ``group``
+    maps one onto the other, and the weight is the orbit size. A draw is
+    picked rank by rank as a suit mask; the mask taken at each rank must be
+    the smallest image of itself under the permutations that fix the cards
+    drawn before it, so only the representatives are ever built. Once nothing but
+    the identity fixes the draw so far, the rest is plain combinations.
+    ``remaining`` must be closed under ``group``.
+    """
+    if len(group) == 1:
+        for combination in combinations(remaining, size):
+            yield combination, 1, group
+        return
+    available = {}
+    for card_id in remaining:
+        available[card_id >> 2] = available.get(card_id >> 2, 0) | 1 << (card_id & 3)
+    ranks = sorted(available)
+    # cards[index]: the remaining cards from the index-th rank on, ascending.
+    cards = [[card_id for card_id in remaining if card_id >> 2 >= rank] for rank in ranks] + [[]]
+    order = len(group)
+
+    def extend(start, left, group, chosen):
+        if not left:
+            yield tuple(chosen), order // len(group), group
+            return
+        if len(group) == 1:
+            for combination in combinations(cards[start], left):
+                yield (*chosen, *combination), order, group
+            return
+        for index in range(start, len(ranks)):
+            if len(cards[index]) < left:
+                return
+            rank = ranks[index]
+            for mask in _SUBMASKS[available[rank]]:
+                taken = len(_SUITS[mask])
+                if taken > left:
+                    continue
+                images = [_PERMUTED_MASKS[permutation][mask] for permutation in group]
+                if mask != min(images):
+                    continue
+                stabilizer = [permutation for permutation, image in zip(group, images) if image == mask]
+                drawn = [rank << 2 | suit for suit in _SUITS[mask]]
+                yield from extend(index + 1, left - taken, stabilizer, chosen + drawn)
+
+    yield from extend(0, size, group, [])
+
+
+def _enumerate(hero_rows, villain_rows, dead, hand_size, symmetric=True, variant=None) -> BoardEquity:
+    remaining = sorted(card.id for card in _check_deal(hero_rows, villain_rows, dead, hand_size, variant))
+    evaluate = _evaluator(hand_size, variant)
+    hands = [hand for pair in zip(hero_rows, villain_rows) for hand in pair]
+    missing = [hand_size - len(hand) for hand in hands]
+    ranks = [evaluate(*hand) if not count else 0 for hand, count in zip(hands, missing)]
+    rows = [[0, 0, 0] for _ in hero_rows]
+    board = [0, 0, 0]
+
+    group = _SUIT_PERMUTATIONS if symmetric else _SUIT_PERMUTATIONS[:1]
+    for known in hands + [dead]:
+        group = _stabilizer(group, [card.id for card in known])
+
+    def tally(weight):
+        score = 0
+        for row, index in zip(rows, range(0, len(ranks), 2)):
+            hero_rank, villain_rank = ranks[index], ranks[index + 1]
+            outcome = 0 if hero_rank < villain_rank else 1 if hero_rank == villain_rank else 2
+            row[outcome] += weight
+            score += (1, 0, -1)[outcome]
+        board[0 if score > 0 else 1 if score == 0 else 2] += weight
+
+    # The last hand to complete; nothing is dealt after it, so it tallies directly.
+    last = max((slot for slot, count in enumerate(missing) if count), default=-1)
+
+    def deal(slot, remaining, group, weight):
+        while slot < len(hands) and not missing[slot]:
+            slot += 1
+        if slot == len(hands):
+            tally(weight)
+            return
+        for combination, orbit, stabilizer in _orbits(remaining, missing[slot], group):
+            ranks[slot] = evaluate(*hands[slot], *[CARDS[card_id] for card_id in combination])
+            if slot == last:
+                tally(weight * orbit)
+                continue
+            rest = [card_id for card_id in remaining if card_id not in combination]
+            deal(slot + 1, rest, stabilizer, weight * orbit)
+
+    deal(0, remaining, group, 1)
+    return BoardEquity([Equity(*row) for row in rows], Equity(*board))
+
+
+def hand_equity_exact(
+    hero: Hand, villain: Hand, dead: Iterable[Card] = (), hand_size: int = 5, variant=None
+) -> Equity:
+    """Count every completion of ``hero`` and ``villain``, see ``hand_equity``.
+
+    Completions that only differ by a permutation of suits the known cards
+    don't tell apart are evaluated once and weighted by how many they stand
+    for, so the counts are exact and match a plain enumeration.
+    """
+    return _enumerate([list(hero)], [list(villain)], list(dead), hand_size, variant=variant).rows[0]
+
+
+def board_equity_exact(
+    hero: Board, villain: Board, dead: Iterable[Card] = (), hand_size: int = 5, variant=None
+) -> BoardEquity:
+    """Count every completion of two boards, see ``hand_equity_exact``."""
+    if len(hero.hands) != len(villain.hands):
+        raise ValueError("Boards must have the same number of hands")
+    hero_rows = [list(hand) for hand in hero.hands]
+    villain_rows = [list(hand) for hand in villain.hands]
+    return _enumerate(hero_rows, villain_rows, list(dead), hand_size, variant=variant)
+
+
+def test_hand_equity_favors_better_start():
+    """Test that a pair of aces is ahead of a pair of kings."""
+    result = hand_equity(Hand.from_str("A♥ A♦"), Hand.from_str("K♥ K♦"), trials=4000, workers=1, seed=1)
+    assert result.trials == 4000
+    assert 0.6 < result.equity < 0.8
+
+
+def test_hand_equity_complete_hands():
+    """Test that complete hands always produce the same outcome."""
+    result = hand_equity(Hand.from_str("A♥ A♦ 2♣ 3♠ 4♥"), Hand.from_str("K♥ K♦ 2♦ 3♣ 4♠"), trials=100, workers=1, seed=1)
+    assert result == Equity(wins=100)
+
+
+def test_equity_reproducible_across_workers():
+    """Test that a seed gives the same result however the work is spread."""
+    hero, villain = Hand.from_str("Q♥ J♥"), Hand.from_str("9♣ 9♠")
+    single = hand_equity(hero, villain, trials=3 * CHUNK_TRIALS, workers=1, seed=5)
+    assert single == hand_equity(hero, villain, trials=3 * CHUNK_TRIALS, workers=1, seed=5)
+    assert single == hand_equity(hero, villain, trials=3 * CHUNK_TRIALS, workers=2, seed=5)
+
+
+def test_board_equity():
+    """Test board equity with known rows and dead cards."""
+    hero = Board.from_str("A♥ A♦ A♣ / 2♥ 3♦")
+    villain = Board.from_str("K♥ K♦ K♣ / 2♣ 3♠")
+    result = board_equity(hero, villain, dead=[Card.from_str("A♠")], trials=1000, workers=1, seed=3)
+    assert len(result.rows) == 2
+    assert result.rows[0].equity > 0.8
+    assert result.board.trials == 1000
+
+
+def test_exact_equity_matches_plain_enumeration():
+    """Test that suit canonicalization doesn't change the exact counts."""
+    hero, villain = [list(Hand.from_str("A♥ A♦ K♣ Q♠"))], [list(Hand.from_str("K♥ J♦ 2♣"))]
+    reduced = _enumerate(hero, villain, [], 5)
+    assert reduced == _enumerate(hero, villain, [], 5, symmetric=False)
+    assert reduced.rows[0].trials == 45 * 44 * 43 // 2
+
+
+def test_orbits_cover_every_draw_once():
+    """Test that orbit representatives and weights account for every draw exactly once."""
+    from math import comb
+
+    known = [card.id for card in Hand.from_str("A♥ A♦ K♣ 7♥ 7♦")]
+    group = _stabilizer(_SUIT_PERMUTATIONS, known)
+    remaining = [card_id for card_id in range(52) if card_id not in known]
+    for size in (1, 2, 3):
+        orbits = list(_orbits(remaining, size, group))
+        assert sum(weight for _, weight, _ in orbits) == comb(len(remaining), size)
+        seen = set()
+        for combination, weight, stabilizer in orbits:
+            images = {_permute(combination, permutation) for permutation in group}
+            assert len(images) == weight and not images & seen
+            assert stabilizer == _stabilizer(group, combination)
+            seen |= images
+
+
+def test_exact_equity_symmetric_start():
+    """Test a start where every suit is interchangeable."""
+    result = hand_equity_exact(Hand.from_str("A♥ A♦ A♣ A♠"), Hand.from_str("K♥ K♦ K♣"))
+    assert result == Equity(wins=45 * 44 * 43 // 2)
+
+
+def test_exact_board_equity_matches_simulation():
+    """Test that exact board equity agrees with a large simulation."""
+    hero = Board.from_str("A♥ 9♦ 7♣ 4♠ / Q♥ Q♦ 3♣ 2♠ 2♥")
+    villain = Board.from_str("K♥ K♦ 5♣ 4♥ / J♥ 10♦ 9♣ 8♠")
+    exact = board_equity_exact(hero, villain)
+    assert exact.board.trials == 35 * 34 * 33
+    simulated = board_equity(hero, villain, trials=20000, workers=1, seed=2)
+    for exact_row, simulated_row in zip(exact.rows, simulated.rows):
+        assert abs(exact_row.equity - simulated_row.equity) < 0.02
@@ -1,2 +1,50 @@
-from card import Card, Suit, Rank
+"""The game's public names in one place.
 
+The card types are imported eagerly; they are cheap. Evaluators and
+simulators pull in lookup tables, NumPy or process pools, so they are only
+imported the first time one of their names is used (``game.hand_equity``,
+``from game import HandStrengthEvaluation``, ...). This keeps short-lived
+processes that never evaluate a hand fast to start.
+"""
+from card import Board, Card, Deck, Hand, Rank, Rng, Suit
+
+_LAZY_NAMES = {
+    "strength": [
+        "Category",
+        "EvaluationCache",
+        "HandStrengthEvaluation",
+        "category_of",
+        "evaluate",
+        "evaluate_batch",
+    ],
+    "equity": [
+        "board_equity",
+        "board_equity_exact",
+        "hand_equity",
+        "hand_equity_exact",
+    ],
+    "scoring": [
+        "Scorer",
+        "ScoringRules",
+        "score",
+    ],
+    "variants": [
+        "VARIANTS",
+        "Variant",
+        "get_variant",
+    ],
+}
+_LAZY_MODULES = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+
+
+def __getattr__(name: str):
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(__import__(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
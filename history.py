@@ -0,0 +1,290 @@
+"""Streaming statistics over hand-history logs.
+
+A log holds one record per line, either plain text or a JSON object:
+
+- ``A♥ K♦ Q♣ J♠ 10♥``: one hand, in ``str(card)`` notation or ASCII
+  aliases (``Ah Kd Qc Js Th``), separated by spaces or commas;
+- ``A♥ K♦ Q♣ J♠ 10♥ | 2♣ 2♦ ...``: the rows of a board, one hand each;
+- ``{"cards": "Ah Kd Qc Js Th", "result": "win"}``: a hand with its
+  outcome, ``"win"``, ``"tie"`` or ``"loss"``; ``cards`` may also be a list;
+- ``{"board": ["Ah Kd ...", ...], "results": ["win", ...]}``: a board, with
+  an optional outcome per row.
+
+Hands have 5 to 7 cards. Lines are read lazily and evaluated a chunk at a
+time with ``strength.evaluate_batch``, and every chunk is folded into a
+``HistoryStats`` of fixed size, so memory doesn't grow with the log. Chunks
+can be spread over worker processes. Lines that can't be parsed are counted
+as invalid rather than stopping the run. Requires NumPy.
+"""
+import argparse
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from card import Card
+from equity import Equity
+from strength import WORST_RANK, Category, _CATEGORY_BY_RANK
+
+CHUNK_LINES = 10000
+RESULTS = {"win": 0, "tie": 1, "loss": 2}
+
+
+def _zeros(*shape):
+    import numpy as np
+
+    return np.zeros(shape, dtype=np.int64)
+
+
+@dataclass
+class HistoryStats:
+    """Running aggregates over the hands of a log.
+
+    ``rank_counts[rank]`` counts hands by rank, ``category_counts[category]``
+    by ``Category``, and ``outcomes[category]`` holds the win, tie and loss
+    counts of hands that recorded a result.
+    """
+
+    hands: int = 0
+    invalid: int = 0
+    rank_counts: "np.ndarray" = field(default_factory=lambda: _zeros(WORST_RANK + 1))
+    category_counts: "np.ndarray" = field(default_factory=lambda: _zeros(len(Category)))
+    outcomes: "np.ndarray" = field(default_factory=lambda: _zeros(len(Category), len(RESULTS)))
+
+    def __add__(self, other: "HistoryStats") -> "HistoryStats":
+        return HistoryStats(
+            self.hands + other.hands,
+            self.invalid + other.invalid,
+            self.rank_counts + other.rank_counts,
+            self.category_counts + other.category_counts,
+            self.outcomes + other.outcomes,
+        )
+
+    def frequencies(self) -> dict[Category, float]:
+        """Share of hands in each category."""
+        return {category: int(count) / self.hands if self.hands else 0.0 for category, count in zip(Category, self.category_counts)}
+
+    def win_rates(self) -> dict[Category, Equity]:
+        """Recorded outcomes per category, for categories that have any."""
+        return {
+            category: Equity(*map(int, counts))
+            for category, counts in zip(Category, self.outcomes)
+            if counts.any()
+        }
+
+    def rank_percentile(self, fraction: float) -> int:
+        """The rank that ``fraction`` of the hands are at least as strong as (0.5 is the median)."""
+        if not self.hands:
+            raise ValueError("No hands recorded")
+        cumulative = self.rank_counts.cumsum()
+        return int(cumulative.searchsorted(max(1, fraction * self.hands)))
+
+    def mean_rank(self) -> float:
+        if not self.hands:
+            raise ValueError("No hands recorded")
+        return float((self.rank_counts * range(WORST_RANK + 1)).sum() / self.hands)
+
+
+def _parse_cards(cards) -> tuple[int, ...]:
+    if isinstance(cards, str):
+        cards = cards.replace(",", " ").split()
+    if not all(isinstance(text, str) for text in cards):
+        raise ValueError(f"Cards must be given as text: {cards}")
+    ids = tuple(Card.from_str(text).id for text in cards)
+    if not 5 <= len(ids) <= 7 or len(set(ids)) != len(ids):
+        raise ValueError(f"Not a hand of 5 to 7 distinct cards: {cards}")
+    return ids
+
+
+def parse_record(line: str) -> list[tuple[tuple[int, ...], Optional[int]]]:
+    """The hands in one log line as ``(card ids, result)`` pairs.
+
+    ``result`` indexes ``RESULTS`` or is None. Raises ValueError or
+    TypeError for malformed lines.
+    """
+    line = line.strip()
+    if not line.startswith("{"):
+        return [(_parse_cards(row), None) for row in line.split("|")]
+    record = json.loads(line)
+    if "board" in record:
+        rows = record["board"]
+        results = record.get("results") or [None] * len(rows)
+        if len(results) != len(rows):
+            raise ValueError("One result per board row expected")
+    elif "cards" in record:
+        rows = [record["cards"]]
+        results = [record.get("result")]
+    else:
+        raise ValueError("A record needs a board or cards")
+    unknown = [result for result in results if result is not None and result not in RESULTS]
+    if unknown:
+        raise ValueError(f"Unknown results: {unknown}")
+    return [
+        (_parse_cards(row), None if result is None else RESULTS[result])
+        for row, result in zip(rows, results)
+    ]
+
+
+def ingest_lines(lines: list[str]) -> HistoryStats:
+    """Aggregate one chunk of log lines."""
+    import numpy as np
+
+    from strength import evaluate_batch
+
+    stats = HistoryStats()
+    by_size = {5: ([], []), 6: ([], []), 7: ([], [])}
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            hands = parse_record(line)
+        except (ValueError, TypeError):
+            stats.invalid += 1
+            continue
+        for ids, result in hands:
+            hand_ids, results = by_size[len(ids)]
+            hand_ids.append(ids)
+            results.append(-1 if result is None else result)
+
+    for hand_ids, results in by_size.values():
+        if not hand_ids:
+            continue
+        ranks, categories = evaluate_batch(np.array(hand_ids, dtype=np.intp))
+        stats.hands += len(ranks)
+        stats.rank_counts += np.bincount(ranks, minlength=WORST_RANK + 1)
+        stats.category_counts += np.bincount(categories, minlength=len(Category))
+        results = np.array(results)
+        known = results >= 0
+        outcome_index = categories[known].astype(np.intp) * len(RESULTS) + results[known]
+        stats.outcomes += np.bincount(outcome_index, minlength=stats.outcomes.size).reshape(stats.outcomes.shape)
+    return stats
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[list[str]]:
+    lines = iter(lines)
+    while chunk := list(islice(lines, size)):
+        yield chunk
+
+
+def ingest(lines: Iterable[str], chunk_size: int = CHUNK_LINES, workers: int = 1) -> HistoryStats:
+    """Aggregate a stream of log lines ``chunk_size`` lines at a time.
+
+    With ``workers`` > 1 chunks are evaluated in that many processes; only a
+    couple of chunks per worker are in flight at once, so memory stays
+    bounded however long the stream is.
+    """
+    total = HistoryStats()
+    chunks = _chunks(lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            total += ingest_lines(chunk)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(ingest_lines, chunk))
+            if len(pending) >= 2 * workers:
+                total += pending.popleft().result()
+        while pending:
+            total += pending.popleft().result()
+    return total
+
+
+def ingest_file(path: str, chunk_size: int = CHUNK_LINES, workers: int = 1) -> HistoryStats:
+    with open(path, encoding="utf-8") as file:
+        return ingest(file, chunk_size, workers)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m history", description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="hand-history log, one record per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_LINES, help="lines evaluated per batch")
+    args = parser.parse_args(argv)
+
+    if args.path == "-":
+        stats = ingest(sys.stdin, args.chunk_size, args.workers)
+    else:
+        stats = ingest_file(args.path, args.chunk_size, args.workers)
+    print(f"{stats.hands:,} hands, {stats.invalid:,} invalid lines")
+    if not stats.hands:
+        return 0
+    win_rates = stats.win_rates()
+    print(f"{'category':<18}{'share':>10}{'equity':>10}")
+    for category, share in stats.frequencies().items():
+        equity = f"{win_rates[category].equity:>10.1%}" if category in win_rates else ""
+        print(f"{category.name:<18}{share:>10.3%}{equity}")
+    print(f"median rank {stats.rank_percentile(0.5)}, mean rank {stats.mean_rank():.0f}")
+    return 0
+
+
+_LOG = [
+    "A♥ K♥ Q♥ J♥ 10♥",
+    "Ah Ad Kc Ks 2h",
+    '{"cards": ["2c", "2d", "2h", "9s", "Kd"], "result": "win"}',
+    '{"cards": "3c,3d,4h,5s,9d", "result": "loss"}',
+    '{"board": ["As Ac Ad 2s 2c", "7h 8h 9h Th Jh Qh"], "results": ["tie", "win"]}',
+    "2s 3s 4s 5d 7c 9h Jc | 4c 4d 4h 4s 2d",
+    "",
+    "A♥ A♥ K♥ Q♥ J♥",
+    "Zz Kd Qc Js Th",
+    '{"cards": "Ah Kd Qc Js Th", "result": "draw"}',
+]
+
+
+def test_ingest_aggregates():
+    """Test parsing, per-category counts, outcomes and invalid lines."""
+    try:
+        import numpy
+    except ImportError:
+        return
+    stats = ingest(_LOG, chunk_size=3)
+    assert stats.hands == 8
+    assert stats.invalid == 3
+    counts = dict(zip(Category, stats.category_counts))
+    assert counts[Category.STRAIGHT_FLUSH] == 2
+    assert counts[Category.FULL_HOUSE] == 1
+    assert counts[Category.TWO_PAIR] == 1
+    assert counts[Category.FOUR_OF_A_KIND] == 1
+    assert counts[Category.HIGH_CARD] == 1
+    assert stats.rank_counts.sum() == 8 and stats.rank_counts[1] == 1
+    win_rates = stats.win_rates()
+    assert win_rates[Category.THREE_OF_A_KIND] == Equity(wins=1)
+    assert win_rates[Category.ONE_PAIR] == Equity(losses=1)
+    assert win_rates[Category.FULL_HOUSE] == Equity(ties=1)
+    assert stats.rank_percentile(0) == 1
+    assert _CATEGORY_BY_RANK[stats.rank_percentile(1)] == Category.HIGH_CARD
+
+
+def test_malformed_records_raise_value_error():
+    """Test that bad cards, keys and results are reported as ValueError."""
+    for line in ["Zz Kd Qc Js Th", '{"hand": "Ah Kd Qc Js Th"}', '{"cards": [1, 2, 3, 4, 5]}', '{"cards": "Ah Kd Qc Js Th", "result": "draw"}']:
+        try:
+            parse_record(line)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{line!r} was accepted")
+
+
+def test_ingest_workers_match_single_process():
+    """Test that spreading chunks over processes gives the same aggregates."""
+    try:
+        import numpy
+    except ImportError:
+        return
+    lines = _LOG * 50
+    single = ingest(lines, chunk_size=40)
+    spread = ingest(lines, chunk_size=40, workers=2)
+    assert single.hands == spread.hands == 400
+    assert single.invalid == spread.invalid
+    assert (single.rank_counts == spread.rank_counts).all()
+    assert (single.outcomes == spread.outcomes).all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Exact odds of completing a partial hand.
+
+A hand of fewer than five cards is completed by drawing the missing cards
+from the unseen ones, every combination equally likely. Rather than
+evaluating every combination, the draws are counted by their shape:
+
+- every way to spread the draws over the ranks is visited once and
+  weighted by the product of binomial coefficients of the unseen cards of
+  each rank, then categorized from the rank counts alone;
+- flushes need every card in one suit, so for each suit the hand could
+  still flush in, the subsets of that suit's unseen ranks are counted
+  separately and moved from the straight or high-card count they were
+  first counted under.
+
+Counts depend only on the hand's and the unseen cards' rank and suit
+makeup, and are memoized on it, so repeated questions (the same shape
+comes up again and again during a game) cost a dictionary lookup.
+
+Jokers aren't counted: hands holding one are rejected with a ``ValueError``.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Iterable, Optional
+
+from card import CARDS, FULL_MASK, JOKERS, Board, Card, Deck, Hand
+from strength import _STRAIGHTS, Category, category_of, evaluate5
+
+_STRAIGHT_MASKS = frozenset(_STRAIGHTS)
+
+
+@dataclass(frozen=True)
+class DrawOdds:
+    """How many of the equally likely draws end in each ``Category``."""
+
+    draws: int
+    counts: tuple[int, ...]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def probability(self, category: Category) -> float:
+        return self.counts[category] / self.total if self.total else 0.0
+
+    def probabilities(self) -> dict[Category, float]:
+        return {category: self.probability(category) for category in Category}
+
+    def at_least(self, category: Category) -> float:
+        """The chance of finishing in ``category`` or better."""
+        return sum(self.counts[category:]) / self.total if self.total else 0.0
+
+
+def _unseen_mask(known: int, deck: Optional[Deck], dead: Iterable[Card]) -> int:
+    unseen = deck.mask if deck is not None else FULL_MASK
+    unseen &= ~known
+    for card in dead:
+        unseen &= ~(1 << card.id)
+    return unseen
+
+
+def _shape(cards: Iterable[Card], unseen: int) -> tuple:
+    held = [0] * 13
+    suit_masks = [0] * 4
+    for card in cards:
+        held[card.id >> 2] += 1
+        suit_masks[card.id & 3] |= card.rank_bit
+    available = [0] * 13
+    unseen_suits = [0] * 4
+    for card_id in range(52):
+        if unseen >> card_id & 1:
+            available[card_id >> 2] += 1
+            unseen_suits[card_id & 3] |= 1 << (card_id >> 2)
+    # A flush is only possible in a suit that holds every card already held.
+    held_suits = [suit for suit in range(4) if suit_masks[suit]]
+    flush_suits = range(4) if not held_suits else held_suits if len(held_suits) == 1 else ()
+    flush_draws = tuple(sorted((suit_masks[suit], unseen_suits[suit]) for suit in flush_suits))
+    return tuple(held), tuple(available), flush_draws
+
+
+@lru_cache(maxsize=1 << 16)
+def _category_counts(held: tuple, available: tuple, flush_draws: tuple, draws: int) -> tuple[int, ...]:
+    counts = [0] * len(Category)
+    kinds = [0] * 5
+    held_mask = 0
+    for rank, count in enumerate(held):
+        kinds[count] += 1
+        if count:
+            held_mask |= 1 << rank
+
+    def visit(rank: int, left: int, ways: int, rank_mask: int) -> None:
+        if not left:
+            if kinds[4]:
+                category = Category.FOUR_OF_A_KIND
+            elif kinds[3]:
+                category = Category.FULL_HOUSE if kinds[2] else Category.THREE_OF_A_KIND
+            elif kinds[2]:
+                category = Category.TWO_PAIR if kinds[2] >= 2 else Category.ONE_PAIR
+            elif rank_mask in _STRAIGHT_MASKS:
+                category = Category.STRAIGHT
+            else:
+                category = Category.HIGH_CARD
+            counts[category] += ways
+            return
+        if rank == 13:
+            return
+        visit(rank + 1, left, ways, rank_mask)
+        have = held[rank]
+        for drawn in range(1, min(left, available[rank], 4 - have) + 1):
+            kinds[have] -= 1
+            kinds[have + drawn] += 1
+            visit(rank + 1, left - drawn, ways * comb(available[rank], drawn), rank_mask | 1 << rank)
+            kinds[have + drawn] -= 1
+            kinds[have] += 1
+
+    visit(0, draws, 1, held_mask)
+
+    for suit_held, suit_unseen in flush_draws:
+        unseen_ranks = [rank for rank in range(13) if suit_unseen >> rank & 1]
+        for ranks in combinations(unseen_ranks, draws):
+            rank_mask = suit_held
+            for rank in ranks:
+                rank_mask |= 1 << rank
+            if rank_mask in _STRAIGHT_MASKS:
+                counts[Category.STRAIGHT] -= 1
+                counts[Category.STRAIGHT_FLUSH] += 1
+            else:
+                counts[Category.HIGH_CARD] -= 1
+                counts[Category.FLUSH] += 1
+    return tuple(counts)
+
+
+def _check_natural(hand: Hand) -> None:
+    if hand.wilds:
+        raise ValueError(f"Draw odds don't count wild cards, and {hand} holds a joker")
+
+
+def _check_partial(hand: Hand) -> None:
+    if len(hand) > 5:
+        raise ValueError(f"Expected at most 5 cards, got {len(hand)}")
+    _check_natural(hand)
+
+
+def _draw_odds(hand: Hand, unseen: int) -> DrawOdds:
+    draws = 5 - len(hand)
+    if draws > unseen.bit_count():
+        raise ValueError(f"Can't draw {draws} cards from {unseen.bit_count()}")
+    return DrawOdds(draws, _category_counts(*_shape(hand, unseen), draws))
+
+
+def draw_odds(hand: Hand, deck: Optional[Deck] = None, dead: Iterable[Card] = ()) -> DrawOdds:
+    """Odds of each category once ``hand`` is completed to five cards.
+
+    The missing cards come from ``deck`` (by default every card not in the
+    hand), minus the ``dead`` cards known to be out of play.
+    """
+    _check_partial(hand)
+    return _draw_odds(hand, _unseen_mask(hand.mask, deck, dead))
+
+
+def board_draw_odds(board: Board, deck: Optional[Deck] = None, dead: Iterable[Card] = ()) -> list[DrawOdds]:
+    """``draw_odds`` of every row of ``board``.
+
+    Every card on the board is excluded from every row's draws. Each row's
+    odds are its own: rows draw from the same cards, so they aren't
+    independent of each other.
+    """
+    known = 0
+    for hand in board.hands:
+        _check_partial(hand)
+        known |= hand.mask
+    unseen = _unseen_mask(known, deck, dead)
+    return [_draw_odds(hand, unseen) for hand in board.hands]
+
+
+def outs(hand: Hand, deck: Optional[Deck] = None, dead: Iterable[Card] = ()) -> dict[Category, list[Card]]:
+    """For a four-card hand, the unseen cards that complete it in each category."""
+    if len(hand) != 4:
+        raise ValueError(f"Outs are for four-card hands, got {len(hand)} cards")
+    _check_natural(hand)
+    unseen = _unseen_mask(hand.mask, deck, dead)
+    result: dict[Category, list[Card]] = {}
+    for card_id in range(52):
+        if unseen >> card_id & 1:
+            card = CARDS[card_id]
+            result.setdefault(category_of(evaluate5(*hand, card)), []).append(card)
+    return result
+
+
+def _brute_force(hand: Hand, unseen: list[Card]) -> list[int]:
+    counts = [0] * len(Category)
+    for drawn in combinations(unseen, 5 - len(hand)):
+        counts[category_of(evaluate5(*hand, *drawn))] += 1
+    return counts
+
+
+def test_draw_odds_match_brute_force():
+    """Test the counted odds against evaluating every draw."""
+    dead = Hand.from_str("Kh 2c 9d").cards
+    for text in ["Ah Kh Qh Jh", "7c 8d 9h", "5s 5d", "2h 3h 4h", "Ts Js", "Qd"]:
+        hand = Hand.from_str(text)
+        unseen = [card for card in CARDS if card not in hand.cards and card not in dead]
+        odds = draw_odds(hand, dead=dead)
+        assert list(odds.counts) == _brute_force(hand, unseen), text
+        assert odds.total == comb(len(unseen), 5 - len(hand))
+
+
+def test_empty_hand_matches_known_frequencies():
+    """Test that drawing five cards from a full deck gives the five-card frequencies."""
+    from enumeration import CATEGORY_COUNTS
+
+    assert draw_odds(Hand()).counts == CATEGORY_COUNTS
+
+
+def test_board_rows_and_outs():
+    """Test per-row odds against the deck, and one-card outs."""
+    board = Board.from_str("As Ad Ac 7s / 2h 3h 4h 5h / 9c 9d /  / Ks Qs Js Ts 2d")
+    deck = Deck()
+    deck.remove([Card.from_str("6h")])
+    rows = board_draw_odds(board, deck)
+    assert [row.draws for row in rows] == [1, 1, 3, 5, 0]
+    assert rows[0].counts[Category.FOUR_OF_A_KIND] == 1
+    assert rows[1].probability(Category.STRAIGHT_FLUSH) == 1 / 36
+    assert rows[1].at_least(Category.STRAIGHT) == (3 + 7 + 1) / 36
+    assert rows[4].counts[Category.HIGH_CARD] == 1
+    completed = outs(board.hands[1], deck, dead=[card for hand in board.hands for card in hand])
+    assert [str(card) for card in completed[Category.STRAIGHT_FLUSH]] == ["A♥"]
+
+
+def test_board_rows_are_checked():
+    """Test that board rows get the same size and deck checks as single hands."""
+    deck = Deck()
+    deck.remove(CARDS[:48])
+    for board, message in [
+        (Board.from_str("2h 3h 4h 5h 6h 7h / Ac"), "at most 5 cards"),
+        (Board.from_str("Ac / 2c"), "Can't draw"),
+    ]:
+        try:
+            board_draw_odds(board, deck)
+        except ValueError as error:
+            assert message in str(error)
+        else:
+            raise AssertionError(f"{board} was accepted")
+
+
+def test_wild_hands_rejected():
+    """Test that hands holding a joker raise a clear error instead of miscounting."""
+    hand = Hand.from_str("Ah Kh Qh")
+    hand.add_card(JOKERS[0])
+    for odds in (draw_odds, outs, lambda hand: board_draw_odds(Board([Hand.from_str("2c"), hand]))):
+        try:
+            odds(hand)
+        except ValueError as error:
+            assert "joker" in str(error)
+        else:
+            raise AssertionError("Expected ValueError")
@@ -0,0 +1,121 @@
+"""Ordering many hands by strength.
+
+All helpers sort on ``Hand.strength``, which each hand computes once and
+caches, so a comparison is an integer comparison. Ties keep the order the
+hands came in. ``top_k`` and ``Leaderboard`` hold only the best ``k`` hands
+at any time, so they can rank a stream of any length.
+"""
+import heapq
+from itertools import count
+from typing import Callable, Generic, Iterable, Optional, TypeVar
+
+from card import Hand
+
+T = TypeVar("T")
+
+
+def _hand_of(hand: Optional[Callable[[T], Hand]]) -> Callable[[T], int]:
+    if hand is None:
+        return Hand.strength
+    return lambda item: hand(item).strength()
+
+
+def sort_hands(items: Iterable[T], hand: Optional[Callable[[T], Hand]] = None, best_first: bool = True) -> list[T]:
+    """``items`` ordered by strength; ties keep their order.
+
+    ``hand`` extracts the hand from each item (e.g. ``lambda seat: seat.hand``),
+    when the items aren't hands themselves.
+    """
+    return sorted(items, key=_hand_of(hand), reverse=best_first)
+
+
+def top_k(items: Iterable[T], k: int, hand: Optional[Callable[[T], Hand]] = None) -> list[T]:
+    """The ``k`` strongest of ``items``, best first, in O(k) memory; earlier items win ties."""
+    return heapq.nlargest(k, items, key=_hand_of(hand))
+
+
+class Leaderboard(Generic[T]):
+    """The ``k`` strongest items pushed so far, updated one item at a time."""
+
+    def __init__(self, k: int, hand: Optional[Callable[[T], Hand]] = None):
+        self.k = k
+        self.seen = 0
+        self._strength = _hand_of(hand)
+        # A min-heap of (strength, -arrival, item): the root is the entry to beat.
+        self._heap: list[tuple[int, int, T]] = []
+        self._arrival = count()
+
+    def push(self, item: T) -> bool:
+        """Offer an item; returns whether it made the board."""
+        self.seen += 1
+        entry = (self._strength(item), -next(self._arrival), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.push(item)
+
+    def threshold(self) -> Optional[int]:
+        """The strength an item must beat to get on a full board."""
+        return self._heap[0][0] if len(self._heap) == self.k else None
+
+    def top(self) -> list[T]:
+        """The board, best first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def test_hand_comparisons():
+    """Test ordering, ties across suits and cache invalidation."""
+    flush = Hand.from_str("2h 5h 7h 9h Jh")
+    straight = Hand.from_str("5c 6d 7h 8s 9c")
+    assert straight < flush and flush > straight and flush >= flush
+    assert Hand.from_str("Ah Kh Qd Jc 9s") == Hand.from_str("As Ks Qc Jd 9h")
+    assert Hand.from_str("Ah Kh Qd Jc 9s") != Hand.from_str("Ah Kh Qd Jc 8s")
+    flush.pop_card()
+    flush.add_card(Hand.from_str("9s").cards[0])
+    assert flush < straight
+    partial = Hand.from_str("Ah Ad")
+    assert partial == partial and partial != Hand.from_str("Ah Ad")
+    try:
+        partial < straight
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Compared a two-card hand")
+
+
+def test_sort_and_top_k_are_stable():
+    """Test that sorting and top-k agree and keep ties in input order."""
+    from card import Deck, Rng
+
+    deck = Deck(rng=Rng(5))
+    hands = []
+    for _ in range(300):
+        deck.reset()
+        hands.append(Hand(deck.draw_cards(5)))
+    ordered = sort_hands(hands)
+    assert all(first >= second for first, second in zip(ordered, ordered[1:]))
+    # Hands compare equal by strength, so track them by identity.
+    position = {id(hand): index for index, hand in enumerate(hands)}
+    for first, second in zip(ordered, ordered[1:]):
+        if first == second:
+            assert position[id(first)] < position[id(second)]
+    best = [id(hand) for hand in ordered[:10]]
+    assert [id(hand) for hand in top_k(iter(hands), 10)] == best
+    seats = list(enumerate(hands))
+    assert [index for index, _ in top_k(seats, 5, hand=lambda seat: seat[1])] == [position[id(hand)] for hand in ordered[:5]]
+
+    board = Leaderboard(10)
+    board.extend(hands)
+    assert [id(hand) for hand in board.top()] == best
+    assert board.seen == 300 and len(board) == 10
+    assert board.threshold() == ordered[9].strength()
@@ -0,0 +1,234 @@
+"""Head-to-head scoring of boards, row by row.
+
+Each row of one board plays the same row of every other board; the lower
+rank wins the row and ties score nothing. Winning a row is worth
+``row_points`` plus the royalty of the winning hand's category, paid by the
+loser. Winning every row against an opponent (a scoop) earns
+``scoop_bonus`` on top. With more than two boards every pair plays, so
+points always sum to zero.
+
+``Scorer`` compiles the rules into a table from rank to row value once, so
+scoring a pair of boards is a few list lookups and comparisons per row.
+``Scorer.score_batch`` does the same for many board pairs held in NumPy
+arrays.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+from card import Board
+from strength import WORST_RANK, Category, _CATEGORY_BY_RANK, _hand_rank
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """Points for a row win, royalties per ``Category`` and the scoop bonus."""
+
+    row_points: int = 1
+    scoop_bonus: int = 3
+    royalties: dict[Category, int] = field(default_factory=dict)
+
+
+@dataclass
+class Scores:
+    """The outcome of scoring boards against each other.
+
+    ``row_winners[row]`` is the index of the board with the best hand in that
+    row, or None when the best hand is tied. ``row_points[board][row]`` and
+    ``bonuses[board]`` are net of what the board paid, and ``points`` is
+    their total per board.
+    """
+
+    row_winners: list[Optional[int]]
+    row_points: list[list[int]]
+    bonuses: list[int]
+    points: list[int]
+
+
+def board_ranks(board: Board) -> list[int]:
+    """The rank of every row of ``board``; every row must hold 5 to 7 cards."""
+    ranks = []
+    for row, hand in enumerate(board.hands):
+        rank = _hand_rank(hand) if 5 <= len(hand) <= 7 else 0
+        if not rank:
+            raise ValueError(f"Row {row} is not a complete hand: {hand}")
+        ranks.append(rank)
+    return ranks
+
+
+class Scorer:
+    """Scores boards under one set of ``ScoringRules``; build it once and reuse it."""
+
+    def __init__(self, rules: Optional[ScoringRules] = None):
+        self.rules = rules or ScoringRules()
+        royalties = self.rules.royalties
+        # _win_value[rank] is what winning a row with a hand of that rank pays.
+        self._win_value = [0] + [
+            self.rules.row_points + royalties.get(_CATEGORY_BY_RANK[rank], 0)
+            for rank in range(1, WORST_RANK + 1)
+        ]
+        self._win_array = None
+
+    def head_to_head(self, ranks: list[int], other_ranks: list[int]) -> int:
+        """Net points of the board with ``ranks`` against the board with ``other_ranks``."""
+        win_value = self._win_value
+        points = wins = losses = 0
+        for mine, theirs in zip(ranks, other_ranks):
+            if mine < theirs:
+                points += win_value[mine]
+                wins += 1
+            elif theirs < mine:
+                points -= win_value[theirs]
+                losses += 1
+        if wins == len(ranks):
+            points += self.rules.scoop_bonus
+        elif losses == len(ranks):
+            points -= self.rules.scoop_bonus
+        return points
+
+    def score(self, boards: list[Board]) -> Scores:
+        """Score two or more boards with the same number of rows against each other."""
+        if len(boards) < 2:
+            raise ValueError("Need at least two boards to score")
+        ranks = [board_ranks(board) for board in boards]
+        rows = len(ranks[0])
+        if any(len(board_rank) != rows for board_rank in ranks):
+            raise ValueError("Boards have different numbers of rows")
+
+        win_value = self._win_value
+        scoop_bonus = self.rules.scoop_bonus
+        row_points = [[0] * rows for _ in boards]
+        bonuses = [0] * len(boards)
+        for first in range(len(boards)):
+            for second in range(first + 1, len(boards)):
+                wins = losses = 0
+                for row, (mine, theirs) in enumerate(zip(ranks[first], ranks[second])):
+                    if mine < theirs:
+                        value = win_value[mine]
+                        wins += 1
+                    elif theirs < mine:
+                        value = -win_value[theirs]
+                        losses += 1
+                    else:
+                        continue
+                    row_points[first][row] += value
+                    row_points[second][row] -= value
+                if wins == rows or losses == rows:
+                    bonus = scoop_bonus if wins == rows else -scoop_bonus
+                    bonuses[first] += bonus
+                    bonuses[second] -= bonus
+
+        row_winners = []
+        for row in range(rows):
+            column = [board_rank[row] for board_rank in ranks]
+            best = min(column)
+            row_winners.append(column.index(best) if column.count(best) == 1 else None)
+        points = [sum(row) + bonus for row, bonus in zip(row_points, bonuses)]
+        return Scores(row_winners, row_points, bonuses, points)
+
+    def score_ranks_batch(self, ranks, other_ranks):
+        """Score many board pairs from their row ranks.
+
+        ``ranks`` and ``other_ranks`` are (N, rows) integer arrays of ranks as
+        returned by ``board_ranks``. Returns ``(points, outcomes)``: an (N,)
+        int32 array of the first board's net points and an (N, rows) int8
+        array holding 1 where it won the row, -1 where it lost and 0 on a
+        tie. Requires NumPy.
+        """
+        import numpy as np
+
+        if self._win_array is None:
+            self._win_array = np.array(self._win_value, dtype=np.int32)
+        ranks = np.asarray(ranks, dtype=np.intp)
+        other_ranks = np.asarray(other_ranks, dtype=np.intp)
+        if ranks.shape != other_ranks.shape or ranks.ndim != 2:
+            raise ValueError(f"Expected two (N, rows) arrays of ranks, got {ranks.shape} and {other_ranks.shape}")
+
+        outcomes = np.sign(other_ranks - ranks).astype(np.int8)
+        row_points = np.where(outcomes > 0, self._win_array[ranks], 0)
+        row_points -= np.where(outcomes < 0, self._win_array[other_ranks], 0)
+        points = row_points.sum(axis=1, dtype=np.int32)
+        points += self.rules.scoop_bonus * (outcomes == 1).all(axis=1)
+        points -= self.rules.scoop_bonus * (outcomes == -1).all(axis=1)
+        return points, outcomes
+
+    def score_batch(self, card_ids, other_card_ids):
+        """Score many board pairs from (N, rows, 5..7) arrays of ``Card.id`` values.
+
+        Rows are ranked with ``strength.evaluate_batch``; the result is that
+        of ``score_ranks_batch``.
+        """
+        import numpy as np
+
+        from strength import evaluate_batch
+
+        card_ids = np.asarray(card_ids)
+        other_card_ids = np.asarray(other_card_ids)
+        if card_ids.ndim != 3 or card_ids.shape != other_card_ids.shape:
+            raise ValueError(
+                f"Expected two (N, rows, cards) arrays of card ids, got {card_ids.shape} and {other_card_ids.shape}"
+            )
+        count, rows, cards = card_ids.shape
+        ranks, _ = evaluate_batch(card_ids.reshape(count * rows, cards))
+        other_ranks, _ = evaluate_batch(other_card_ids.reshape(count * rows, cards))
+        return self.score_ranks_batch(ranks.reshape(count, rows), other_ranks.reshape(count, rows))
+
+
+_default_scorer = None
+
+
+def score(boards: list[Board], rules: Optional[ScoringRules] = None) -> Scores:
+    """Score boards against each other, see ``Scorer.score``."""
+    global _default_scorer
+    if rules is not None:
+        return Scorer(rules).score(boards)
+    if _default_scorer is None:
+        _default_scorer = Scorer()
+    return _default_scorer.score(boards)
+
+
+def test_head_to_head_rows_and_scoop():
+    """Test row winners, royalties and the scoop bonus."""
+    strong = Board.from_str("A♥ A♦ K♣ Q♠ J♥ / 2♥ 2♦ 2♣ 5♠ 7♥ / 3♥ 4♥ 5♥ 6♥ 8♥ / 9♣ 9♦ 9♥ 9♠ 2♠ / 10♣ J♣ Q♣ K♣ A♣")
+    weak = Board.from_str("K♥ K♦ 3♣ 4♠ 6♦ / 3♦ 3♣ 4♦ 5♦ 7♦ / 7♠ 8♠ 10♠ J♠ 2♣ / 8♣ 8♦ 8♥ 6♣ 6♠ / 2♦ 4♣ 6♥ 8♦ 10♥")
+    rules = ScoringRules(royalties={Category.FOUR_OF_A_KIND: 4, Category.STRAIGHT_FLUSH: 10})
+    result = score([strong, weak], rules)
+    assert result.row_winners == [0, 0, 0, 0, 0]
+    assert result.row_points[0] == [1, 1, 1, 5, 11]
+    assert result.bonuses == [3, -3]
+    assert result.points == [22, -22]
+    scorer = Scorer(rules)
+    assert scorer.head_to_head(board_ranks(weak), board_ranks(strong)) == -22
+
+
+def test_ties_and_multiway():
+    """Test that tied rows score nothing and multiway points sum to zero."""
+    first = Board.from_str("A♥ A♦ K♣ Q♠ J♥ / 2♥ 3♦ 4♣ 5♠ 7♥")
+    second = Board.from_str("A♣ A♠ K♦ Q♥ J♦ / 2♦ 3♣ 4♥ 5♦ 8♣")
+    third = Board.from_str("K♥ K♦ 3♣ 4♠ 6♦ / 9♥ 9♦ 2♣ 3♠ 4♦")
+    result = score([first, second, third])
+    assert result.row_winners == [None, 2]
+    assert result.row_points == [[1, -2], [1, 0], [-2, 2]]
+    assert sum(result.points) == 0
+
+
+def test_score_batch_matches_scalar():
+    """Test that the batch form agrees with scoring boards one pair at a time."""
+    try:
+        import numpy as np
+    except ImportError:
+        return
+
+    from card import Deck, Hand, Rng
+
+    scorer = Scorer(ScoringRules(royalties={Category.FLUSH: 2, Category.FULL_HOUSE: 3}))
+    deck = Deck(rng=Rng(7))
+    pairs = []
+    for _ in range(200):
+        deck.reset()
+        pairs.append([Board([Hand(deck.draw_cards(5)) for _ in range(5)]) for _ in range(2)])
+    ids = np.array([[[[card.id for card in hand] for hand in board.hands] for board in pair] for pair in pairs])
+    points, outcomes = scorer.score_batch(ids[:, 0], ids[:, 1])
+    for (board, other), batch_points, batch_outcomes in zip(pairs, points, outcomes):
+        result = scorer.score([board, other])
+        assert result.points[0] == batch_points
+        assert [1 if winner == 0 else -1 if winner == 1 else 0 for winner in result.row_winners] == list(batch_outcomes)
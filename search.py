@@ -0,0 +1,218 @@
+"""Time-budgeted search for where to place a dealt card.
+
+A placement is valued by the points it's expected to score. At depth 0 a
+board is valued by rollouts: the unseen cards are dealt at random into
+every unfinished row, the opponents' included, and the boards are scored
+with ``Scorer.head_to_head``. At depth d, ``width`` possible next cards
+are sampled, each is placed in its best open row searched to depth d - 1,
+and the values are averaged. All candidates of one node see the same
+samples, so their differences aren't noise from the draw.
+
+``PlacementSearch`` deepens one level at a time until the budget runs
+out, and answers with the best row of the deepest search it finished.
+Results are kept in a transposition table keyed on the card masks of
+every row and of the unseen cards, which don't depend on the order cards
+were placed in, so a later decision in the same game reuses what an
+earlier search already valued.
+"""
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from card import FULL_MASK, Board, Card, CARDS
+from engine import ROW_SIZE, greedy_row, open_rows
+from scoring import Scorer
+from strength import _rank_of_state
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+@dataclass
+class SearchStats:
+    """How far the last search got."""
+
+    depth: int = -1
+    nodes: int = 0
+    table_hits: int = 0
+    elapsed_ms: float = 0.0
+
+
+class PlacementSearch:
+    """A policy (see ``engine.Policy``) that searches for ``budget_ms`` per decision.
+
+    ``opponents`` are the other players' boards, when known; otherwise each
+    rollout deals a random opponent board from the unseen cards. ``clock``
+    returns the time in seconds that the budget is measured against.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float = 50.0,
+        width: int = 4,
+        rollouts: int = 16,
+        rng=None,
+        scorer: Optional[Scorer] = None,
+        table_size: int = 1 << 18,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.budget_ms = budget_ms
+        self.width = width
+        self.rollouts = rollouts
+        self.rng = rng if rng is not None else random.Random()
+        self.scorer = scorer or Scorer()
+        self.table_size = table_size
+        self.clock = clock
+        self.table: dict[tuple, tuple[int, float]] = {}
+        self.stats = SearchStats()
+
+    def __call__(self, board: Board, card: Card, rows: list[int]) -> int:
+        return self.choose_row(board, card, rows)
+
+    def choose_row(
+        self, board: Board, card: Card, rows: list[int], opponents: Iterable[Board] = (), dead: Iterable[Card] = ()
+    ) -> int:
+        started = self.clock()
+        self._deadline = started + self.budget_ms / 1000
+        self.stats = SearchStats()
+        self._opponents = list(opponents)
+        seen = 1 << card.id
+        for other in [board, *self._opponents]:
+            for hand in other.hands:
+                seen |= hand.mask
+        for dead_card in dead:
+            seen |= 1 << dead_card.id
+        unseen = FULL_MASK & ~seen
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        best = greedy_row(board, card, rows) if len(rows) > 1 else rows[0]
+        depth = 0
+        remaining = sum(ROW_SIZE - len(hand) for hand in board.hands) - 1
+        while len(rows) > 1 and depth <= remaining:
+            seed = self.rng.random()
+            try:
+                values = []
+                for row in rows:
+                    board.add_card(card, row)
+                    try:
+                        values.append(self._value(board, unseen, depth, seed))
+                    finally:
+                        board.hands[row].pop_card()
+            except _OutOfTime:
+                break
+            best = rows[values.index(max(values))]
+            self.stats.depth = depth
+            depth += 1
+        self.stats.elapsed_ms = (self.clock() - started) * 1000
+        return best
+
+    def _value(self, board: Board, unseen: int, depth: int, seed: float) -> float:
+        self.stats.nodes += 1
+        rows = open_rows(board)
+        key = (
+            tuple(hand.mask for hand in board.hands),
+            tuple(hand.mask for opponent in self._opponents for hand in opponent.hands),
+            unseen,
+        )
+        entry = self.table.get(key)
+        if entry is not None and (entry[0] >= depth or not rows):
+            self.stats.table_hits += 1
+            return entry[1]
+        if self.clock() > self._deadline:
+            raise _OutOfTime
+        if depth == 0 or not rows:
+            value = self._rollouts(board, unseen, seed)
+        else:
+            rng = random.Random(seed)
+            unseen_ids = [card_id for card_id in range(52) if unseen >> card_id & 1]
+            samples = rng.sample(unseen_ids, min(self.width, len(unseen_ids)))
+            total = 0.0
+            for card_id in samples:
+                card = CARDS[card_id]
+                best = None
+                for row in rows:
+                    board.add_card(card, row)
+                    try:
+                        value = self._value(board, unseen ^ 1 << card_id, depth - 1, rng.random())
+                    finally:
+                        board.hands[row].pop_card()
+                    if best is None or value > best:
+                        best = value
+                total += best
+            value = total / len(samples)
+        self.table[key] = (depth, value)
+        return value
+
+    def _rollouts(self, board: Board, unseen: int, seed: float) -> float:
+        """Mean points over random completions of every board."""
+        rng = random.Random(seed)
+        unseen_cards = [CARDS[card_id] for card_id in range(52) if unseen >> card_id & 1]
+        mine = [(hand.prime_product, hand.suit_masks, ROW_SIZE - len(hand)) for hand in board.hands]
+        if self._opponents:
+            theirs = [
+                [(hand.prime_product, hand.suit_masks, ROW_SIZE - len(hand)) for hand in opponent.hands]
+                for opponent in self._opponents
+            ]
+        else:
+            theirs = [[(1, [0, 0, 0, 0], ROW_SIZE)] * len(board.hands)]
+        needed = sum(row[2] for row in mine) + sum(row[2] for opponent in theirs for row in opponent)
+        head_to_head = self.scorer.head_to_head
+        total = 0
+        for _ in range(self.rollouts):
+            cards = iter(rng.sample(unseen_cards, needed))
+            ranks = _complete(mine, cards)
+            for opponent in theirs:
+                total += head_to_head(ranks, _complete(opponent, cards))
+        return total / self.rollouts
+
+
+def _complete(rows: list[tuple[int, list[int], int]], cards) -> list[int]:
+    """Ranks of rows (prime product, suit masks, cards missing) completed from ``cards``."""
+    ranks = []
+    for product, suit_masks, missing in rows:
+        suit_masks = suit_masks[:]
+        for _ in range(missing):
+            card = next(cards)
+            product *= card.prime
+            suit_masks[card.id & 3] |= card.rank_bit
+        ranks.append(_rank_of_state(product, suit_masks))
+    return ranks
+
+
+def test_search_prefers_the_made_hand():
+    """Test that an ace goes next to the pair of aces rather than into a dead row."""
+    board = Board.from_str("A♥ A♦ 7♣ 2♠ / 3♣ 8♦ J♠ 4♥ / 5♦ 9♣ K♥ 6♠ / 2♦ 7♥ Q♣ 10♠ / 4♣ 9♦ 3♠ J♥")
+    opponent = Board.from_str("K♣ K♦ 8♣ 3♦ / Q♦ Q♥ 5♣ 6♥ / 10♥ 10♣ 4♦ 2♣ / 9♥ 9♠ 8♠ 5♥ / J♣ J♦ 7♦ 6♦")
+    search = PlacementSearch(budget_ms=200, rng=random.Random(3))
+    assert search.choose_row(board, Card.from_str("A♣"), open_rows(board), [opponent]) == 0
+    assert search.stats.depth >= 0 and search.stats.nodes > 0
+
+
+def _ticking_clock(step_ms: float) -> Callable[[], float]:
+    """A clock that moves ``step_ms`` forward every time it is read, so budgets don't depend on load."""
+    ticks = iter(range(1 << 62))
+    return lambda: next(ticks) * step_ms / 1000
+
+
+def test_search_answers_within_budget():
+    """Test that an early-game search stops at its budget with a legal row."""
+    board = Board.from_str("A♥ / K♦ / 7♣ / 2♠ / 9♥")
+    search = PlacementSearch(budget_ms=20, rng=random.Random(1), clock=_ticking_clock(0.1))
+    row = search(board, Card.from_str("A♠"), [0, 1, 2, 3, 4])
+    assert 20 <= search.stats.elapsed_ms < 20 + 1
+    assert row in range(5)
+    assert [len(hand) for hand in board.hands] == [1] * 5
+
+
+def test_transposition_table_reuse():
+    """Test that searching the same position again is answered from the table."""
+    board = Board.from_str("A♥ K♥ Q♥ J♥ / 2♣ 2♦ 5♠ 7♣ / 3♦ 3♣ 8♥ 9♠ / 4♠ 6♦ 8♣ 10♦ / 5♥ 6♣ 9♦ J♠")
+    opponent = Board.from_str("K♣ K♠ 8♦ 3♥ / Q♦ Q♣ 5♣ 6♥ / 10♥ 10♣ 4♦ 2♥ / 9♥ 9♣ 8♠ 5♦ / J♣ J♦ 7♦ 6♠")
+    search = PlacementSearch(budget_ms=30, rng=random.Random(2), clock=_ticking_clock(0.1))
+    search.choose_row(board, Card.from_str("10♠"), open_rows(board), [opponent])
+    depth = search.stats.depth
+    assert search.choose_row(board, Card.from_str("10♠"), open_rows(board), [opponent]) in open_rows(board)
+    assert search.stats.table_hits > 0 and search.stats.depth >= depth
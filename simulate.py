@@ -0,0 +1,190 @@
+"""Headless self-play between bot policies.
+
+Games are split into chunks of ``CHUNK_GAMES``, each dealt from its own
+``Rng`` stream derived from the seed (as in ``equity``), so results don't
+depend on the number of workers. Chunks run in worker processes and only
+their summaries and encoded records come back.
+
+Every game can be written as a compact record: the game number and player
+count (``RECORD_HEADER``), every board's ``Board.to_bytes``, then each
+player's points as int16. ``read_records`` reads them back.
+"""
+import os
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, Optional
+
+from card import Board, Rng
+from engine import RandomPolicy, Table, first_open_row, greedy_row, play_game
+from search import PlacementSearch
+
+CHUNK_GAMES = 200
+RECORD_HEADER = struct.Struct("<IB")
+
+# name -> factory taking an ``Rng`` and returning a policy. "search" stops on
+# a time budget, so its games depend on machine load, not only on the seed.
+POLICIES = {
+    "first": lambda rng: first_open_row,
+    "random": lambda rng: RandomPolicy(rng.random()),
+    "greedy": lambda rng: greedy_row,
+    "search": lambda rng: PlacementSearch(budget_ms=5, rng=rng),
+}
+
+
+@dataclass
+class SimulationResult:
+    """Totals per seat over all games played."""
+
+    policies: list[str]
+    games: int = 0
+    seconds: float = 0.0
+    points: list[int] = field(default_factory=list)
+    wins: list[int] = field(default_factory=list)
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def add(self, games: int, points: list[int], wins: list[int]) -> None:
+        self.games += games
+        self.points = [mine + more for mine, more in zip(self.points, points)] if self.points else points
+        self.wins = [mine + more for mine, more in zip(self.wins, wins)] if self.wins else wins
+
+
+def _play_chunk(policies: list[str], seed, index: int, start: int, games: int, record: bool):
+    """Play games ``start`` to ``start + games``; returns per-seat points and wins, and the records."""
+    rng = Rng(seed).stream(index)
+    players = [POLICIES[name](rng.stream(seat)) for seat, name in enumerate(policies)]
+    points = [0] * len(players)
+    wins = [0] * len(players)
+    records = bytearray()
+    points_format = struct.Struct(f"<{len(players)}h")
+    for game in range(start, start + games):
+        table, scores = play_game(players, rng)
+        for seat, seat_points in enumerate(scores.points):
+            points[seat] += seat_points
+            wins[seat] += seat_points > 0
+        if record:
+            records += RECORD_HEADER.pack(game, len(players))
+            for board in table.boards:
+                records += board.to_bytes()
+            records += points_format.pack(*scores.points)
+    return points, wins, bytes(records)
+
+
+def simulate(
+    games: int,
+    policies: list[str],
+    workers: Optional[int] = None,
+    seed=None,
+    output: Optional[BinaryIO] = None,
+) -> SimulationResult:
+    """Play ``games`` games between ``policies`` (names from ``POLICIES``), one per seat.
+
+    Records are written to ``output`` in game order when it is given.
+    """
+    if games < 1:
+        raise ValueError(f"Need at least one game, got {games}")
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown policies: {', '.join(unknown)}")
+    # Check the seat count here, not once per chunk in every worker.
+    Table(len(policies))
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), "big")
+    chunks = [
+        (policies, seed, index, start, min(CHUNK_GAMES, games - start), output is not None)
+        for index, start in enumerate(range(0, games, CHUNK_GAMES))
+    ]
+    result = SimulationResult(list(policies))
+    started = time.perf_counter()
+
+    def collect(points, wins, records, games):
+        result.add(games, points, wins)
+        if output is not None:
+            output.write(records)
+
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            collect(*_play_chunk(*chunk), chunk[4])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((executor.submit(_play_chunk, *chunk), chunk[4]))
+                if len(pending) >= 2 * workers:
+                    future, count = pending.popleft()
+                    collect(*future.result(), count)
+            while pending:
+                future, count = pending.popleft()
+                collect(*future.result(), count)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def read_records(buffer) -> Iterator[tuple[int, list[Board], list[int]]]:
+    """``(game, boards, points)`` for every record written by ``simulate``."""
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        game, players = RECORD_HEADER.unpack_from(view, offset)
+        offset += RECORD_HEADER.size
+        boards = []
+        for _ in range(players):
+            board = Board.from_buffer(view, offset)
+            offset += 1 + len(board.hands) + sum(map(len, board.hands))
+            boards.append(board)
+        points = list(struct.unpack_from(f"<{players}h", view, offset))
+        offset += 2 * players
+        yield game, boards, points
+
+
+def test_simulate_is_reproducible_across_workers():
+    """Test that a seed gives the same totals however the games are spread."""
+    single = simulate(3 * CHUNK_GAMES // 2, ["greedy", "random"], workers=1, seed=8)
+    spread = simulate(3 * CHUNK_GAMES // 2, ["greedy", "random"], workers=2, seed=8)
+    assert single.games == spread.games == 3 * CHUNK_GAMES // 2
+    assert (single.points, single.wins) == (spread.points, spread.wins)
+    assert sum(single.points) == 0
+    assert single.points[0] > 0
+
+
+def test_too_many_seats_rejected_up_front():
+    """Test that more seats than one deck can fill fail before any worker starts."""
+    try:
+        simulate(10, ["greedy", "random", "first"], workers=2, seed=1)
+    except ValueError as error:
+        assert "3 players" in str(error)
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_no_games_rejected():
+    """Test that a simulation of no games is an error rather than an empty result."""
+    for games in (0, -5):
+        try:
+            simulate(games, ["greedy", "random"], workers=1, seed=1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{games} games were accepted")
+
+
+def test_records_roundtrip():
+    """Test that every game's boards and points can be read back."""
+    import io
+
+    from scoring import score
+
+    output = io.BytesIO()
+    result = simulate(5, ["first", "greedy"], workers=1, seed=2, output=output)
+    records = list(read_records(output.getbuffer()))
+    assert [game for game, _, _ in records] == list(range(5))
+    assert sum(points[0] for _, _, points in records) == result.points[0]
+    for _, boards, points in records:
+        assert all(len(hand) == 5 for board in boards for hand in board.hands)
+        assert score(boards).points == points
@@ -1,72 +1,791 @@
-from card import Rank, Hand, Card, Suit
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import IntEnum
+from itertools import combinations
+from typing import Iterable, Iterator, Optional
+
+from card import RANK_PRIMES, Rank, Hand, Card, Suit
+
+
+class Category(IntEnum):
+    """Hand categories, weakest first."""
+
+    HIGH_CARD = 0
+    ONE_PAIR = 1
+    TWO_PAIR = 2
+    THREE_OF_A_KIND = 3
+    STRAIGHT = 4
+    FLUSH = 5
+    FULL_HOUSE = 6
+    FOUR_OF_A_KIND = 7
+    STRAIGHT_FLUSH = 8
+
+
+# Hand ranks follow the usual 1..7462 numbering of the 5-card equivalence
+# classes: 1 is a royal flush, 7462 is 7-5-4-3-2 offsuit, lower is better.
+BEST_RANK = 1
+WORST_RANK = 7462
+
+# Worst rank of each category, best category first.
+_CATEGORY_BOUNDS = (
+    (10, Category.STRAIGHT_FLUSH),
+    (166, Category.FOUR_OF_A_KIND),
+    (322, Category.FULL_HOUSE),
+    (1599, Category.FLUSH),
+    (1609, Category.STRAIGHT),
+    (2467, Category.THREE_OF_A_KIND),
+    (3325, Category.TWO_PAIR),
+    (6185, Category.ONE_PAIR),
+    (7462, Category.HIGH_CARD),
+)
+
+# Rank-bit patterns of the ten straights, best first (the wheel is last).
+_STRAIGHTS = tuple(0b11111 << (top - 4) for top in range(12, 3, -1)) + (0b1_0000_0000_1111,)
+
+
+def _prime_product(rank_indexes: Iterable[int]) -> int:
+    product = 1
+    for index in rank_indexes:
+        product *= RANK_PRIMES[index]
+    return product
+
+
+def _build_five_card_tables() -> tuple[list[int], list[int], dict[int, int]]:
+    """Number every 5-card equivalence class from best to worst.
+
+    Hands made of five distinct ranks are keyed by their rank bits, in one
+    table for flushes and one for everything else. Hands with a repeated
+    rank can't be flushes and are keyed by the product of their rank primes,
+    which is unique per rank multiset.
+    """
+    flush = [0] * 8192
+    unique = [0] * 8192
+    paired = {}
+    descending = range(12, -1, -1)
+    high_cards = [
+        bits
+        for bits in (sum(1 << index for index in ranks) for ranks in combinations(descending, 5))
+        if bits not in _STRAIGHTS
+    ]
+    rank = BEST_RANK
+
+    def assign(table, key):
+        nonlocal rank
+        table[key] = rank
+        rank += 1
+
+    for bits in _STRAIGHTS:
+        assign(flush, bits)
+    for quads in descending:
+        for kicker in descending:
+            if kicker != quads:
+                assign(paired, RANK_PRIMES[quads] ** 4 * RANK_PRIMES[kicker])
+    for trips in descending:
+        for pair in descending:
+            if pair != trips:
+                assign(paired, RANK_PRIMES[trips] ** 3 * RANK_PRIMES[pair] ** 2)
+    for bits in high_cards:
+        assign(flush, bits)
+    for bits in _STRAIGHTS:
+        assign(unique, bits)
+    for trips in descending:
+        for kickers in combinations([index for index in descending if index != trips], 2):
+            assign(paired, RANK_PRIMES[trips] ** 3 * _prime_product(kickers))
+    for high, low in combinations(descending, 2):
+        for kicker in descending:
+            if kicker not in (high, low):
+                assign(paired, (RANK_PRIMES[high] * RANK_PRIMES[low]) ** 2 * RANK_PRIMES[kicker])
+    for pair in descending:
+        for kickers in combinations([index for index in descending if index != pair], 3):
+            assign(paired, RANK_PRIMES[pair] ** 2 * _prime_product(kickers))
+    for bits in high_cards:
+        assign(unique, bits)
+
+    assert rank == WORST_RANK + 1
+    return flush, unique, paired
+
+
+def _build_best_of_tables(flush5, unique5, paired, primes=RANK_PRIMES) -> tuple[list[int], dict[int, int]]:
+    """Extend the 5-card tables to the best five of six or seven cards, drawn from ranks of ``primes``.
+
+    Removing a bit from a suit's rank mask (or a prime from a product)
+    always yields a smaller key, so each larger hand is resolved from its
+    sub-hands with one pass per table instead of enumerating combinations.
+    A flush of six or seven cards can't be beaten by any non-flush made
+    from the same cards, so flushes and non-flushes are tabled separately.
+    """
+    flush = list(flush5)
+    for bits in range(8192):
+        if 6 <= bits.bit_count() <= 7:
+            flush[bits] = min(flush[bits & ~(1 << index)] for index in range(13) if bits >> index & 1)
+
+    level = {_prime_product(i for i in range(13) if bits >> i & 1): rank for bits, rank in enumerate(unique5) if rank}
+    level.update(paired)
+    by_product = dict(level)
+    for _ in range(2):
+        bigger = {}
+        for product, rank in level.items():
+            for prime in primes:
+                if product % prime ** 4:
+                    key = product * prime
+                    if rank < bigger.get(key, WORST_RANK + 1):
+                        bigger[key] = rank
+        by_product.update(bigger)
+        level = bigger
+    return flush, by_product
+
+
+# On-disk tables: a fixed header followed by native-endian arrays, the 8-byte
+# ones first so every section stays aligned. Bump TABLE_FORMAT_VERSION
+# whenever the layout or the numbering changes; files with another version,
+# byte order or checksum are regenerated.
+TABLE_FORMAT_VERSION = 2
+_TABLE_MAGIC = b"CARDSEVT"
+_TABLE_SECTIONS = (
+    ("paired_slots", "q"),
+    ("product_keys", "q"),
+    ("product_slots", "q"),
+    ("flush", "h"),
+    ("unique5", "h"),
+    ("flush_best", "h"),
+    ("paired_slot_ranks", "h"),
+    ("product_ranks", "h"),
+    ("product_slot_ranks", "h"),
+)
+_TABLE_HEADER = struct.Struct(f"<8sIB3x{len(_TABLE_SECTIONS)}Q32s")
+# Hash sections have this many spare slots past the last home slot, so a
+# probe never wraps around.
+_PROBE_PAD = 64
+_BYTE_ORDER = {"little": 0, "big": 1}[sys.byteorder]
+
+
+def table_path() -> str:
+    """Where the evaluator tables are cached, ``$CARDS_TABLES`` if set."""
+    if os.environ.get("CARDS_TABLES"):
+        return os.environ["CARDS_TABLES"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "cards", f"strength-tables-v{TABLE_FORMAT_VERSION}.bin")
+
+
+def _hash_layout(table: dict[int, int]) -> tuple[array, array]:
+    """Lay ``table`` out for ``_MappedTable``: open addressing, linear probing, 0 marking an empty slot."""
+    modulus = 2 * len(table) + 1
+    while True:
+        while any(modulus % divisor == 0 for divisor in range(2, int(modulus**0.5) + 1)):
+            modulus += 1
+        keys = [0] * (modulus + _PROBE_PAD)
+        ranks = [0] * (modulus + _PROBE_PAD)
+        # Sorted, so the layout depends only on the table's contents.
+        for key, rank in sorted(table.items()):
+            slot = key % modulus
+            while slot < len(keys) and keys[slot]:
+                slot += 1
+            if slot == len(keys):
+                break
+            keys[slot] = key
+            ranks[slot] = rank
+        else:
+            return array("q", keys), array("h", ranks)
+        modulus += 1
+
+
+def _pack_sections(flush, unique5, paired, flush_best, by_product) -> dict[str, array]:
+    """The built tables as the sections of a table file."""
+    product_keys = sorted(by_product)
+    paired_slots, paired_slot_ranks = _hash_layout(paired)
+    product_slots, product_slot_ranks = _hash_layout(by_product)
+    return {
+        "paired_slots": paired_slots,
+        "product_keys": array("q", product_keys),
+        "product_slots": product_slots,
+        "flush": array("h", flush),
+        "unique5": array("h", unique5),
+        "flush_best": array("h", flush_best),
+        "paired_slot_ranks": paired_slot_ranks,
+        "product_ranks": array("h", [by_product[key] for key in product_keys]),
+        "product_slot_ranks": product_slot_ranks,
+    }
+
+
+def _build_table_sections() -> dict[str, array]:
+    flush, unique5, paired = _build_five_card_tables()
+    flush_best, by_product = _build_best_of_tables(flush, unique5, paired)
+    return _pack_sections(flush, unique5, paired, flush_best, by_product)
+
+
+def write_tables(path: str, sections: dict[str, array]) -> None:
+    """Write tables atomically, so concurrent readers never see a partial file."""
+    payload = b"".join(sections[name].tobytes() for name, _ in _TABLE_SECTIONS)
+    lengths = [len(sections[name]) for name, _ in _TABLE_SECTIONS]
+    header = _TABLE_HEADER.pack(
+        _TABLE_MAGIC, TABLE_FORMAT_VERSION, _BYTE_ORDER, *lengths, hashlib.sha256(payload).digest()
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(header)
+        file.write(payload)
+    os.replace(temporary, path)
+
+
+def open_tables(path: str) -> Optional[dict[str, memoryview]]:
+    """Map a table file read-only, or return None if it is missing, stale or corrupt.
+
+    Sections are zero-copy views of the mapping, so every process that opens
+    the same file shares its pages.
+    """
+    try:
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapping) < _TABLE_HEADER.size:
+        return None
+    magic, version, byte_order, *lengths, checksum = _TABLE_HEADER.unpack_from(mapping)
+    if (magic, version, byte_order) != (_TABLE_MAGIC, TABLE_FORMAT_VERSION, _BYTE_ORDER):
+        return None
+    view = memoryview(mapping)
+    payload = view[_TABLE_HEADER.size :]
+    if hashlib.sha256(payload).digest() != checksum:
+        return None
+    sections = {}
+    offset = 0
+    for (name, typecode), length in zip(_TABLE_SECTIONS, lengths):
+        size = length * array(typecode).itemsize
+        if offset + size > len(payload):
+            return None
+        sections[name] = payload[offset : offset + size].cast(typecode)
+        offset += size
+    return sections
+
+
+def _load_tables(path: Optional[str] = None, build=_build_table_sections) -> dict:
+    """Open the cached tables at ``path``, generating them with ``build`` and caching them first if needed.
+
+    If the cache can't be written, freshly built tables are used from memory.
+    """
+    path = path or table_path()
+    sections = open_tables(path)
+    if sections is None:
+        built = build()
+        try:
+            write_tables(path, built)
+        except OSError:
+            return built
+        sections = open_tables(path) or built
+    return sections
+
+
+class _MappedTable:
+    """A read-only ``{key: rank}`` table read in place from two hash sections, see ``_hash_layout``.
+
+    A lookup costs about a tenth more than a dict's, but nothing is copied:
+    every process reading the same table file shares its pages.
+    """
+
+    __slots__ = ("keys", "ranks", "modulus")
+
+    def __init__(self, keys, ranks):
+        self.keys = keys
+        self.ranks = ranks
+        self.modulus = len(keys) - _PROBE_PAD
+
+    def get(self, key: int, default: int = 0) -> int:
+        keys = self.keys
+        slot = key % self.modulus
+        while True:
+            found = keys[slot]
+            if found == key:
+                return self.ranks[slot]
+            if not found:
+                return default
+            slot += 1
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        return ((key, rank) for key, rank in zip(self.keys, self.ranks) if key)
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.keys if key)
+
+
+_TABLES = _load_tables()
+# The scalar evaluator copies the three 8192-entry tables into lists, which
+# index faster than the mapped views; the product tables are read in place.
+_FLUSH = _TABLES["flush"].tolist()
+_UNIQUE5 = _TABLES["unique5"].tolist()
+_FLUSH_BEST = _TABLES["flush_best"].tolist()
+_PAIRED = _MappedTable(_TABLES["paired_slots"], _TABLES["paired_slot_ranks"])
+_BY_PRODUCT = _MappedTable(_TABLES["product_slots"], _TABLES["product_slot_ranks"])
+
+_CATEGORY_BY_RANK = [Category.STRAIGHT_FLUSH]
+for _worst, _category in _CATEGORY_BOUNDS:
+    _CATEGORY_BY_RANK.extend([_category] * (_worst - len(_CATEGORY_BY_RANK) + 1))
+
+
+def category_of(rank: int) -> Category:
+    return _CATEGORY_BY_RANK[rank]
+
+
+def evaluate5(c1: Card, c2: Card, c3: Card, c4: Card, c5: Card) -> int:
+    """Rank five distinct cards, 1 (royal flush) to 7462 (worst high card).
+
+    Returns 0 if any of them is a joker, which has no rank; ``evaluate``
+    ranks hands with jokers as wild cards.
+    """
+    bits = c1.rank_bit | c2.rank_bit | c3.rank_bit | c4.rank_bit | c5.rank_bit
+    if c1.suit_bit & c2.suit_bit & c3.suit_bit & c4.suit_bit & c5.suit_bit:
+        return _FLUSH[bits]
+    return _UNIQUE5[bits] or _PAIRED.get(c1.prime * c2.prime * c3.prime * c4.prime * c5.prime, 0)
+
+
+def evaluate_best(cards: Iterable[Card]) -> int:
+    """Rank the best 5-card hand among 5 to 7 distinct cards.
+
+    The cards are folded one at a time into a prime product and four
+    per-suit rank masks, and the result is read from a single table.
+    Jokers add nothing to either, so they are ignored rather than wild; use
+    ``evaluate`` for hands that may hold them.
+    """
+    product = 1
+    suits = [0, 0, 0, 0]
+    for card in cards:
+        product *= card.prime
+        suits[card.id & 3] |= card.rank_bit
+    return _rank_of_state(product, suits)
+
+
+def _rank_of_state(product: int, suit_masks: list[int]) -> int:
+    for bits in suit_masks:
+        if bits.bit_count() >= 5:
+            return _FLUSH_BEST[bits]
+    return _BY_PRODUCT.get(product, 0)
+
+
+# Jokers (``card.JOKERS``) a hand may hold. A wild plays as the card that
+# makes the best standard hand: there is no five of a kind, so a joker
+# with four aces makes quads with the best kicker.
+MAX_WILDS = 2
+
+_wild = None
+
+
+def _wild_tables() -> tuple[list[dict[int, int]], list[list[int]]]:
+    """Per number of wilds, the best rank by the natural cards' prime product and per suit mask.
+
+    Each level is derived from the one with a wild fewer: taking a card away
+    and adding a wild can only keep or improve the rank, so the best rank of
+    a product is the best over the products that have one card more, and
+    likewise for a suit's rank mask. Built on first use.
+    """
+    global _wild
+    if _wild is None:
+        products = [dict(_BY_PRODUCT.items())]
+        flushes = [_FLUSH_BEST]
+        for wilds in range(1, MAX_WILDS + 1):
+            fewer = products[-1]
+            level: dict[int, int] = {}
+            for key, rank in fewer.items():
+                for prime in RANK_PRIMES:
+                    if key % prime == 0:
+                        smaller = key // prime
+                        if rank < level.get(smaller, WORST_RANK + 1):
+                            level[smaller] = rank
+            products.append(level)
+            fewer_flush = flushes[-1]
+            flush = [0] * len(fewer_flush)
+            for bits in range(len(flush)):
+                if 5 <= bits.bit_count() + wilds <= 7:
+                    ranks = [fewer_flush[bits | 1 << rank] for rank in range(13) if not bits >> rank & 1]
+                    flush[bits] = min(rank for rank in ranks if rank)
+            flushes.append(flush)
+        _wild = products, flushes
+    return _wild
+
+
+def _rank_with_wilds(product: int, suit_masks: list[int], wilds: int) -> int:
+    """``_rank_of_state`` of a hand that also holds ``wilds`` jokers."""
+    if not wilds:
+        return _rank_of_state(product, suit_masks)
+    if wilds > MAX_WILDS:
+        return 0
+    products, flushes = _wild_tables()
+    rank = products[wilds].get(product, 0)
+    # With wilds, quads and full houses can come with a flush, so both count.
+    flush = flushes[wilds]
+    for bits in suit_masks:
+        suited = flush[bits]
+        if suited and (not rank or suited < rank):
+            rank = suited
+    return rank
+
+
+def _hand_rank(hand: Hand) -> int:
+    if hand.wilds:
+        return _rank_with_wilds(hand.prime_product, hand.suit_masks, hand.wilds)
+    return _rank_of_state(hand.prime_product, hand.suit_masks)
+
+
+def hand_strength(hand: Hand) -> int:
+    """``WORST_RANK + 1 - rank`` of a 5 to 7 card hand, so stronger hands get larger numbers."""
+    if not 5 <= len(hand) <= 7:
+        raise ValueError(f"Cannot rank a hand of {len(hand)} cards")
+    rank = _hand_rank(hand)
+    if not rank:
+        raise ValueError(f"Not a valid hand: {hand}")
+    return WORST_RANK + 1 - rank
+
+
+def evaluate(cards: Iterable[Card]) -> int:
+    """Rank a hand of 5 to 7 cards by its best five, see ``evaluate5``; jokers are wild."""
+    cards = list(cards)
+    if not 5 <= len(cards) <= 7:
+        raise ValueError(f"Expected 5 to 7 cards, got {len(cards)}")
+    if any(card.id >= 52 for card in cards):
+        rank = _hand_rank(Hand(cards))
+    elif len(cards) == 5:
+        rank = evaluate5(*cards)
+    else:
+        rank = evaluate_best(cards)
+    if not rank:
+        raise ValueError(f"Not a valid hand: {', '.join(map(str, cards))}")
+    return rank
+
+
+_batch_tables = None
+
+
+def _numpy_tables():
+    """Build the NumPy views of the evaluator tables on first batch use."""
+    global _batch_tables
+    if _batch_tables is None:
+        import numpy as np
+
+        from card import CARDS, JOKERS
+
+        # Jokers have a prime of 1 and no suit bits.
+        _batch_tables = {
+            "prime": np.array([card.prime for card in CARDS + JOKERS], dtype=np.int64),
+            # One 13-bit rank mask per suit, packed side by side.
+            "suited_bit": np.array([card.rank_bit << 13 * (card.id & 3) for card in CARDS + JOKERS], dtype=np.int64),
+            "flush": np.frombuffer(_TABLES["flush_best"], dtype=np.int16),
+            "products": np.frombuffer(_TABLES["product_keys"], dtype=np.int64),
+            "product_ranks": np.frombuffer(_TABLES["product_ranks"], dtype=np.int16),
+            "category": np.array(_CATEGORY_BY_RANK, dtype=np.int8),
+        }
+    return _batch_tables
+
+
+_batch_wild_tables = None
+
+
+def _numpy_wild_tables():
+    """``_wild_tables`` as sorted product keys, their ranks and flush arrays, one entry per number of wilds."""
+    global _batch_wild_tables
+    if _batch_wild_tables is None:
+        import numpy as np
+
+        products, flushes = _wild_tables()
+        _batch_wild_tables = [None]
+        for wilds in range(1, MAX_WILDS + 1):
+            keys = np.array(sorted(products[wilds]), dtype=np.int64)
+            ranks = np.array([products[wilds][key] for key in keys.tolist()], dtype=np.int16)
+            _batch_wild_tables.append((keys, ranks, np.array(flushes[wilds], dtype=np.int16)))
+    return _batch_wild_tables
+
+
+def _lookup_batch(ids, tables, flushes: bool = True):
+    """Look up the rows of ``ids`` in ``tables`` laid out like ``_numpy_tables``.
+
+    Returns the ranks, with a flush taking precedence unless ``flushes`` is
+    false, and each row's prime product and packed suit masks.
+    """
+    import numpy as np
+
+    if ids.ndim != 2 or not 5 <= ids.shape[1] <= 7:
+        raise ValueError(f"Expected an (N, 5..7) array of card ids, got shape {ids.shape}")
+    shared = _numpy_tables()
+    products = shared["prime"][ids].prod(axis=1)
+    index = np.searchsorted(tables["products"], products)
+    np.minimum(index, len(tables["products"]) - 1, out=index)
+    ranks = np.where(tables["products"][index] == products, tables["product_ranks"][index], 0).astype(np.int16)
+
+    suited = np.bitwise_or.reduce(shared["suited_bit"][ids], axis=1)
+    if flushes:
+        for suit in range(4):
+            flush = tables["flush"][(suited >> 13 * suit) & 0x1FFF]
+            np.copyto(ranks, flush, where=flush > 0)
+    return ranks, products, suited
+
+
+def evaluate_batch(card_ids):
+    """Rank many hands at once.
+
+    ``card_ids`` is an (N, 5), (N, 6) or (N, 7) integer array of ``Card.id``
+    values, one hand per row, jokers included. Returns ``(ranks, categories)``:
+    an (N,) int16 array of ranks as returned by ``evaluate`` and an (N,) int8
+    array of ``Category`` values. Requires NumPy.
+    """
+    import numpy as np
+
+    tables = _numpy_tables()
+    ids = np.asarray(card_ids, dtype=np.intp)
+    ranks, products, suited = _lookup_batch(ids, tables)
+
+    wilds = (ids >= 52).sum(axis=1)
+    if wilds.any():
+        wild_tables = _numpy_wild_tables()
+        ranks[wilds > MAX_WILDS] = 0
+        for count in range(1, MAX_WILDS + 1):
+            rows = np.flatnonzero(wilds == count)
+            if not len(rows):
+                continue
+            keys, key_ranks, flush_ranks = wild_tables[count]
+            index = np.searchsorted(keys, products[rows])
+            np.minimum(index, len(keys) - 1, out=index)
+            wild_ranks = np.where(keys[index] == products[rows], key_ranks[index], 0).astype(np.int16)
+            for suit in range(4):
+                flush = flush_ranks[(suited[rows] >> 13 * suit) & 0x1FFF]
+                np.copyto(wild_ranks, flush, where=(flush > 0) & ((wild_ranks == 0) | (flush < wild_ranks)))
+            ranks[rows] = wild_ranks
+
+    if len(ranks) and not ranks.all():
+        raise ValueError(f"Not a valid hand in row {int(np.argmin(ranks))}")
+    return ranks, tables["category"][ranks]
+
+
+def _category_of_kinds(kinds: list[int], wilds: int = 0) -> Category:
+    """Categorize a hand from how many ranks it holds once, twice, ... (``Hand.kinds``).
+
+    ``wilds`` join the largest group, which is always their best use.
+    """
+    if wilds:
+        top = max((count for count in range(5) if kinds[count]), default=0)
+        kinds = kinds[:]
+        kinds[top] -= 1
+        kinds[min(top + wilds, 4)] += 1
+    if kinds[4]:
+        return Category.FOUR_OF_A_KIND
+    if kinds[3]:
+        return Category.FULL_HOUSE if kinds[2] else Category.THREE_OF_A_KIND
+    if kinds[2]:
+        return Category.TWO_PAIR if kinds[2] >= 2 else Category.ONE_PAIR
+    return Category.HIGH_CARD
+
+
+def _potential_category(hand: Hand) -> Category:
+    """The best category ``hand`` can still reach once completed to five cards.
+
+    Only the hand itself is considered, not which cards are left to draw.
+    """
+    # Jokers can still become any card, so they count as free slots.
+    free = 5 - len(hand) + hand.wilds
+    kinds = hand.kinds
+    top = max((count for count in range(5) if kinds[count]), default=0)
+    one_suit = max(hand.suit_counts) == len(hand) - hand.wilds
+    straight = top <= 1 and any(not hand.rank_mask & ~bits for bits in _STRAIGHTS)
+    if one_suit and straight:
+        return Category.STRAIGHT_FLUSH
+    if top + free >= 4:
+        return Category.FOUR_OF_A_KIND
+    if top <= 3 and 13 - kinds[0] <= 2:
+        return Category.FULL_HOUSE
+    if one_suit:
+        return Category.FLUSH
+    if straight:
+        return Category.STRAIGHT
+    if top + free >= 3:
+        return Category.THREE_OF_A_KIND
+    if top + free >= 2:
+        return Category.ONE_PAIR
+    return Category.HIGH_CARD
+
+
+_PAIR_CATEGORIES = {Category.ONE_PAIR, Category.TWO_PAIR, Category.FULL_HOUSE}
+_TRIPS_CATEGORIES = {Category.THREE_OF_A_KIND, Category.FULL_HOUSE}
+_STRAIGHT_CATEGORIES = {Category.STRAIGHT, Category.STRAIGHT_FLUSH}
+_FLUSH_CATEGORIES = {Category.FLUSH, Category.STRAIGHT_FLUSH}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __add__(self, other: "CacheStats") -> "CacheStats":
+        return CacheStats(
+            self.hits + other.hits,
+            self.misses + other.misses,
+            self.evictions + other.evictions,
+            self.size + other.size,
+        )
+
+
+_caches = weakref.WeakSet()
+
+
+def _reset_cache_locks() -> None:
+    # A lock held by another thread at fork time would never be released in the child.
+    for cache in _caches:
+        cache._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_cache_locks)
+
+
+class EvaluationCache:
+    """A bounded LRU cache of hand ranks, keyed by the hand's card bitmask.
+
+    The bitmask (``Hand.mask``) doesn't depend on card order, so every
+    ordering of the same cards shares one entry. Lookups are guarded by a
+    lock so a cache can be shared between threads. Each process gets its
+    own copy of a cache; the lock is recreated in forked children and
+    ``stats()`` from several processes can be added up. A cache for a
+    ``variants.Variant`` ranks by that variant's rules.
+    """
+
+    def __init__(self, maxsize: int = 1 << 16, variant=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.variant = variant
+        self._ranks = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        _caches.add(self)
+
+    def rank(self, hand: Hand) -> int:
+        """Rank a hand of 5 to 7 cards, see ``evaluate``."""
+        if not isinstance(hand, Hand):
+            hand = Hand(hand)
+        key = hand.mask
+        with self._lock:
+            rank = self._ranks.get(key)
+            if rank is not None:
+                self._ranks.move_to_end(key)
+                self._stats.hits += 1
+                return rank
+            self._stats.misses += 1
+        if self.variant is not None:
+            rank = self.variant.rank(hand)
+        else:
+            if not 5 <= len(hand) <= 7:
+                raise ValueError(f"Expected 5 to 7 cards, got {len(hand)}")
+            rank = _hand_rank(hand)
+            if not rank:
+                raise ValueError(f"Not a valid hand: {hand}")
+        with self._lock:
+            self._ranks[key] = rank
+            if len(self._ranks) > self.maxsize:
+                self._ranks.popitem(last=False)
+                self._stats.evictions += 1
+        return rank
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._stats.hits, self._stats.misses, self._stats.evictions, len(self._ranks))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ranks.clear()
+            self._stats = CacheStats()
 
 
 class HandStrengthEvaluation:
-    def __init__(self, hand: Hand):
-        self.bitmap = {rank: 0 for rank in Rank}
+    """Evaluates a hand once; every predicate is then answered from its rank.
+
+    The rank is read from the state ``Hand`` keeps up to date as cards are
+    added, so no card is rescanned. Hands of 6 or 7 cards are judged by
+    their best five. Straights and flushes need five cards, so smaller hands
+    are categorized by their rank counts only and have no ``rank()``; larger
+    hands raise ``ValueError``. With
+    a cache for a ``variants.Variant``, ranks and categories follow its rules.
+    """
+
+    def __init__(self, hand: Hand, cache: Optional[EvaluationCache] = None):
+        if not isinstance(hand, Hand):
+            hand = Hand(hand)
+        if len(hand) > 7:
+            raise ValueError(f"Cannot rank a hand of {len(hand)} cards")
+        self.hand = hand
         self.cards = list(hand)
-        for card in hand:
-            self.bitmap[card.rank] += 1
+        self._royal_rank = BEST_RANK
+        if 5 <= len(hand) <= 7:
+            if cache is not None:
+                self._rank = cache.rank(hand)
+            else:
+                self._rank = _hand_rank(hand)
+                if not self._rank:
+                    raise ValueError(f"Not a valid hand: {hand}")
+            if cache is not None and cache.variant is not None:
+                tables = cache.variant.tables()
+                self._category = tables.categories[self._rank]
+                self._royal_rank = tables.royal_rank
+            else:
+                self._category = _CATEGORY_BY_RANK[self._rank]
+        else:
+            self._rank = None
+            self._category = _category_of_kinds(hand.kinds, hand.wilds)
+
+    def rank(self) -> int:
+        if self._rank is None:
+            raise ValueError(f"Cannot rank a hand of {len(self.cards)} cards")
+        return self._rank
+
+    def category(self) -> Category:
+        return self._category
+
+    def potential_category(self) -> Category:
+        """The best category this hand can still become, see ``_potential_category``."""
+        if len(self.cards) >= 5:
+            return self._category
+        return _potential_category(self.hand)
 
     def has_pair(self) -> bool:
-        return any(count == 2 for count in self.bitmap.values())
+        return self._category in _PAIR_CATEGORIES
 
     def has_three_of_a_kind(self) -> bool:
-        return any(count == 3 for count in self.bitmap.values())
+        return self._category in _TRIPS_CATEGORIES
 
     def has_four_of_a_kind(self) -> bool:
-        return any(count == 4 for count in self.bitmap.values())
+        return self._category == Category.FOUR_OF_A_KIND
 
     def has_full_house(self) -> bool:
-        return self.has_three_of_a_kind() and self.has_pair()
+        return self._category == Category.FULL_HOUSE
 
     def has_two_pair(self) -> bool:
-        pair_count = sum(1 for count in self.bitmap.values() if count == 2)
-        return pair_count == 2
+        return self._category == Category.TWO_PAIR
 
     def has_straight(self) -> bool:
         """Check if hand contains a straight, including wheel (A-2-3-4-5) and high straight (10-J-Q-K-A)."""
-        if len(self.cards) < 5:
-            return False
-        
-        ranks = [card.rank.value for card in self.cards]
-        unique_ranks = sorted(set(ranks))
-        
-        # Need exactly 5 unique ranks for a straight (no duplicates allowed)
-        if len(unique_ranks) != 5:
-            return False
-        
-        # Check for wheel (A-2-3-4-5) - Ace low straight (special case)
-        wheel_ranks = {Rank.ACE.value, Rank.TWO.value, Rank.THREE.value, Rank.FOUR.value, Rank.FIVE.value}
-        if wheel_ranks == set(unique_ranks):
-            return True
-        
-        # Check for regular straight: 5 consecutive unique ranks
-        # For a 5-card hand, we only need to check if max - min == 4
-        if unique_ranks[4] - unique_ranks[0] == 4:
-            return True
-        
-        return False
+        return self._category in _STRAIGHT_CATEGORIES
 
     def has_flush(self) -> bool:
         """Check if all cards are of the same suit."""
-        if len(self.cards) < 5:
-            return False
-        suits = [card.suit for card in self.cards]
-        return len(set(suits)) == 1
+        return self._category in _FLUSH_CATEGORIES
 
     def has_straight_flush(self) -> bool:
         """Check if hand is both a straight and a flush."""
-        return self.has_straight() and self.has_flush()
+        return self._category == Category.STRAIGHT_FLUSH
 
     def has_royal_flush(self) -> bool:
         """Check if hand is A-K-Q-J-10 all of the same suit."""
-        if not self.has_flush():
-            return False
-        
-        required_ranks = {Rank.ACE, Rank.KING, Rank.QUEEN, Rank.JACK, Rank.TEN}
-        hand_ranks = {card.rank for card in self.cards}
-        return required_ranks == hand_ranks
+        return self._rank is not None and self._rank == self._royal_rank
 
 
 def test_high_card():
@@ -545,3 +1264,218 @@ def test_edge_case_hand_with_fewer_than_five_cards():
     assert not eval.has_flush()  # Need 5 cards for a flush
     assert not eval.has_straight_flush()
     assert not eval.has_royal_flush()
+
+
+def test_rank_bounds():
+    """Test the best and worst hands and the category boundaries."""
+    assert HandStrengthEvaluation(Hand.from_str("A♥ K♥ Q♥ J♥ 10♥")).rank() == BEST_RANK
+    assert HandStrengthEvaluation(Hand.from_str("7♥ 5♦ 4♣ 3♠ 2♥")).rank() == WORST_RANK
+    assert category_of(10) == Category.STRAIGHT_FLUSH
+    assert category_of(11) == Category.FOUR_OF_A_KIND
+    assert category_of(6186) == Category.HIGH_CARD
+
+
+def test_rank_orders_hands():
+    """Test that a lower rank means a stronger hand, kickers included."""
+    ordered = [
+        "A♥ K♥ Q♥ J♥ 10♥",
+        "5♠ 4♠ 3♠ 2♠ A♠",
+        "9♥ 9♦ 9♣ 9♠ 2♥",
+        "3♥ 3♦ 3♣ A♠ A♥",
+        "A♦ Q♦ 9♦ 5♦ 3♦",
+        "6♥ 5♦ 4♣ 3♠ 2♥",
+        "5♥ 4♦ 3♣ 2♠ A♥",
+        "K♥ K♦ K♣ 3♠ 2♥",
+        "K♥ K♦ 3♣ 3♠ 4♥",
+        "K♥ K♦ 3♣ 3♠ 2♥",
+        "A♥ A♦ 4♣ 3♠ 2♥",
+        "K♥ K♦ A♣ Q♠ J♥",
+        "A♥ K♦ Q♣ J♠ 9♥",
+    ]
+    ranks = [HandStrengthEvaluation(Hand.from_str(hand)).rank() for hand in ordered]
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == len(ranks)
+
+
+def test_rank_ignores_suits_and_order():
+    """Test that hands with the same ranks and no flush are equivalent."""
+    assert evaluate(Hand.from_str("A♥ A♦ K♣ Q♠ J♥")) == evaluate(Hand.from_str("J♣ Q♦ K♥ A♠ A♣"))
+
+
+def test_rank_partial_hand():
+    """Test that hands with fewer than 5 cards have a category but no rank."""
+    eval = HandStrengthEvaluation(Hand.from_str("A♥ A♦ K♣ K♠"))
+    assert eval.category() == Category.TWO_PAIR
+    try:
+        eval.rank()
+    except ValueError:
+        pass
+    else:
+        assert False, "Expected ValueError"
+
+
+def test_more_than_seven_cards_rejected():
+    """Test that hands too large to rank raise instead of being categorized as partial."""
+    try:
+        HandStrengthEvaluation(Hand.from_str("2♥ 3♥ 4♥ 5♥ 6♥ 7♥ 8♥ 9♥"))
+    except ValueError:
+        pass
+    else:
+        assert False, "Expected ValueError"
+
+
+def test_best_of_seven_matches_all_combinations():
+    """Test the 6- and 7-card tables against the best of every 5-card subset."""
+    import random
+    from card import CARDS
+
+    rng = random.Random(7)
+    for size in (6, 7):
+        for _ in range(2000):
+            cards = rng.sample(CARDS, size)
+            assert evaluate(cards) == min(evaluate5(*five) for five in combinations(cards, 5))
+
+
+def test_seven_card_hand():
+    """Test that a 7-card hand is judged by its best five cards."""
+    eval = HandStrengthEvaluation(Hand.from_str("A♥ A♦ A♣ K♠ K♥ Q♣ Q♠"))
+    assert eval.has_full_house()
+    assert eval.rank() == evaluate(Hand.from_str("A♥ A♦ A♣ K♠ K♥"))
+
+    eval = HandStrengthEvaluation(Hand.from_str("2♥ 9♥ 3♦ 4♣ 5♠ 6♥ 6♦"))
+    assert eval.has_straight()
+    assert not eval.has_pair()
+
+    eval = HandStrengthEvaluation(Hand.from_str("2♥ 9♥ J♥ 4♥ 5♥ 6♥ 6♦"))
+    assert eval.has_flush()
+    assert eval.rank() == evaluate(Hand.from_str("J♥ 9♥ 6♥ 5♥ 4♥"))
+
+
+def test_evaluate_batch():
+    """Test that batch evaluation agrees with evaluating hands one by one."""
+    import random
+
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    from card import CARDS
+
+    rng = random.Random(4)
+    for size in (5, 7):
+        hands = [rng.sample(CARDS, size) for _ in range(500)]
+        ranks, categories = evaluate_batch(np.array([[card.id for card in hand] for hand in hands]))
+        assert ranks.tolist() == [evaluate(hand) for hand in hands]
+        assert categories.tolist() == [category_of(evaluate(hand)) for hand in hands]
+
+
+def test_wild_cards_match_substitution():
+    """Test jokers against trying every card in their place, scalar and batched."""
+    import random
+    from itertools import permutations
+
+    from card import CARDS, JOKERS
+
+    rng = random.Random(6)
+    hands = []
+    for _ in range(300):
+        wilds = rng.choice([1, 2])
+        cards = rng.sample(CARDS, rng.choice([5, 6, 7]) - wilds) + list(JOKERS[:wilds])
+        rng.shuffle(cards)
+        hands.append(cards)
+    hands.append([*Hand.from_str("A♥ A♦ A♣ A♠"), JOKERS[0]])
+    hands.append([*Hand.from_str("A♥ K♥ Q♥ J♥ J♦ J♣"), JOKERS[1]])
+    for cards in hands:
+        naturals = [card for card in cards if card.id < 52]
+        unseen = [card for card in CARDS if card not in naturals]
+        best = min(evaluate(naturals + list(sub)) for sub in permutations(unseen, len(cards) - len(naturals)))
+        assert evaluate(cards) == HandStrengthEvaluation(cards).rank() == best, cards
+    assert evaluate(hands[-2]) == 11 and category_of(evaluate(hands[-1])) == Category.STRAIGHT_FLUSH
+    assert HandStrengthEvaluation([JOKERS[0], *Hand.from_str("9♥ 9♦")]).has_three_of_a_kind()
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    for size in (5, 6, 7):
+        rows = [cards for cards in hands if len(cards) == size]
+        ranks, _ = evaluate_batch(np.array([[card.id for card in cards] for cards in rows]))
+        assert ranks.tolist() == [evaluate(cards) for cards in rows]
+
+
+def test_incremental_state_matches_fresh_evaluation():
+    """Test that adding and popping cards keeps the hand's state exact."""
+    import random
+    from card import CARDS
+
+    rng = random.Random(9)
+    for _ in range(300):
+        cards = rng.sample(CARDS, 7)
+        hand = Hand()
+        for card in cards:
+            hand.add_card(card)
+            fresh = Hand(hand.cards)
+            assert HandStrengthEvaluation(hand).category() == HandStrengthEvaluation(fresh).category()
+        while len(hand) > 5:
+            hand.pop_card()
+        assert HandStrengthEvaluation(hand).rank() == evaluate(cards[:5])
+
+
+def test_board_add_card():
+    """Test placing cards on a board one at a time."""
+    from card import Board
+
+    board = Board.empty()
+    for text, row in [("A♥", 0), ("A♦", 0), ("K♣", 1)]:
+        board.add_card(Card.from_str(text), row)
+    assert HandStrengthEvaluation(board.hands[0]).has_pair()
+    assert len(board.hands[1]) == 1 and len(board.hands[2]) == 0
+
+
+def test_potential_category():
+    """Test the best category still reachable by a partial hand."""
+    assert HandStrengthEvaluation(Hand()).potential_category() == Category.STRAIGHT_FLUSH
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 10♥ K♥")).potential_category() == Category.STRAIGHT_FLUSH
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 10♥ 2♥")).potential_category() == Category.FLUSH
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 9♦ 2♥")).potential_category() == Category.FOUR_OF_A_KIND
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 9♦ 2♥ 2♣")).potential_category() == Category.FULL_HOUSE
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 9♦ 2♥ 3♣")).potential_category() == Category.THREE_OF_A_KIND
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 8♦ 5♥ 3♣")).potential_category() == Category.ONE_PAIR
+    assert HandStrengthEvaluation(Hand.from_str("9♥ 8♦ 7♥ 5♣")).potential_category() == Category.STRAIGHT
+
+
+def test_evaluation_cache():
+    """Test cache hits across card orders, LRU eviction and the counters."""
+    cache = EvaluationCache(maxsize=2)
+    pair, flush, straight = Hand.from_str("A♥ A♦ K♣ Q♠ J♥"), Hand.from_str("A♥ Q♥ 9♥ 5♥ 3♥"), Hand.from_str("9♣ 8♦ 7♥ 6♠ 5♣")
+    assert cache.rank(pair) == evaluate(pair)
+    assert cache.rank(Hand.from_str("J♥ Q♠ K♣ A♦ A♥")) == evaluate(pair)
+    cache.rank(flush)
+    cache.rank(pair)
+    cache.rank(straight)
+    assert cache.stats() == CacheStats(hits=2, misses=3, evictions=1, size=2)
+    assert HandStrengthEvaluation(flush, cache=cache).has_flush()
+    assert cache.stats().misses == 4
+
+
+def test_table_file_roundtrip_and_regeneration():
+    """Test that tables reopen from disk and stale files are rejected."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tables.bin")
+        assert open_tables(path) is None
+        write_tables(path, _build_table_sections())
+        sections = open_tables(path)
+        assert list(sections["flush_best"]) == list(_FLUSH_BEST)
+        assert dict(zip(sections["product_keys"], sections["product_ranks"])) == dict(_BY_PRODUCT.items())
+        assert len(_BY_PRODUCT) == len(sections["product_keys"])
+
+        data = bytearray(open(path, "rb").read())
+        data[-1] ^= 0xFF
+        open(path, "wb").write(bytes(data))
+        assert open_tables(path) is None
+
+        data[-1] ^= 0xFF
+        data[8] += 1
+        open(path, "wb").write(bytes(data))
+        assert open_tables(path) is None
@@ -0,0 +1,436 @@
+"""Game variants: which cards are dealt and how hands rank.
+
+A ``Variant`` declares its deck, as the ranks it keeps, and its ranking
+rules. From those, every 5-card equivalence class is ordered and numbered
+from 1 (the best hand) up, and the same tables the standard evaluator
+reads are built for it: rank-bit tables for flushes and for five distinct
+ranks, prime products for paired hands, and their best-of-six-or-seven
+extensions. So ranking a hand in any variant is a table lookup, not a
+chain of predicates. Tables are built on first use and cached on disk
+next to the standard ones, see ``strength.table_path``.
+
+Variants share the rest of the machinery: ``Variant.evaluate_batch``
+runs on ``strength``'s batch lookup, ``EvaluationCache(variant=...)``
+caches a variant's ranks, and ``equity`` takes a ``variant`` to deal from
+its deck and rank by its rules. Jokers are only supported by the standard
+evaluator.
+"""
+import dataclasses
+import hashlib
+import os
+from collections import Counter
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Iterable
+
+from card import CARDS, RANK_PRIMES, RANKS, Card, Deck, Hand, Rank
+from strength import (
+    Category,
+    _build_best_of_tables,
+    _MappedTable,
+    _load_tables,
+    _lookup_batch,
+    _pack_sections,
+    _prime_product,
+    table_path,
+)
+
+# Rank bits of ten, jack, queen, king and ace.
+_ROYAL_BITS = 0b1_1111_0000_0000
+
+
+@dataclass(frozen=True)
+class Variant:
+    """A deck and the rules that rank hands dealt from it.
+
+    - ``ranks``: the ranks in the deck, four suits each
+    - ``low``: the lowest hand wins, as in lowball
+    - ``ace_low``: aces rank below deuces
+    - ``straights`` / ``flushes``: whether they count as made hands
+    - ``wheel``: an ace also plays below the lowest rank of a straight
+      (A-2-3-4-5, or A-6-7-8-9 in a short deck)
+    - ``flush_beats_full_house``: swap the two categories, as in short deck
+    """
+
+    name: str
+    ranks: tuple[Rank, ...] = RANKS
+    low: bool = False
+    ace_low: bool = False
+    straights: bool = True
+    flushes: bool = True
+    wheel: bool = True
+    flush_beats_full_house: bool = False
+
+    def tables(self) -> "VariantTables":
+        """This variant's lookup tables, built or loaded on first use."""
+        tables = _tables.get(self)
+        if tables is None:
+            tables = _tables[self] = VariantTables(self)
+        return tables
+
+    def deck(self, shuffled: bool = True, rng=None) -> Deck:
+        return Deck(shuffled=shuffled, rng=rng, ranks=self.ranks)
+
+    @property
+    def cards(self) -> tuple[Card, ...]:
+        """The cards of this variant's deck, in id order."""
+        return tuple(card for card in CARDS if card.rank in self.ranks)
+
+    def rank(self, hand: Hand) -> int:
+        """Rank a hand of 5 to 7 cards, 1 being the best hand of this variant."""
+        if not 5 <= len(hand) <= 7:
+            raise ValueError(f"Expected 5 to 7 cards, got {len(hand)}")
+        if hand.wilds:
+            raise ValueError(f"Jokers aren't played in {self.name}")
+        rank = self.tables().rank_of_state(hand.prime_product, hand.suit_masks)
+        if not rank:
+            raise ValueError(f"Not a valid {self.name} hand: {hand}")
+        return rank
+
+    def evaluate(self, cards: Iterable[Card]) -> int:
+        """Rank a list of 5 to 7 cards, see ``rank``."""
+        return self.tables().evaluate(cards)
+
+    def category_of(self, rank: int) -> Category:
+        return self.tables().categories[rank]
+
+    def evaluate_batch(self, card_ids):
+        """Rank many hands at once, see ``strength.evaluate_batch``. Requires NumPy."""
+        return self.tables().evaluate_batch(card_ids)
+
+
+class VariantTables:
+    """A variant's evaluator tables and the lookups over them.
+
+    The layout matches ``strength``'s, so a hand's ``prime_product`` and
+    ``suit_masks`` index them directly. Outside the high-hand games a flush
+    doesn't always decide a six or seven card hand, so those hands are
+    ranked from their 5-card subsets instead, which only happens when a
+    suit holds five cards.
+    """
+
+    def __init__(self, variant: Variant):
+        self.variant = variant
+        classes = _rank_keys(variant)
+        if _rules(variant) == _rules(STANDARD):
+            import strength
+
+            sections = strength._TABLES
+        else:
+            sections = _load_tables(_table_path(variant), lambda: _build_sections(variant, classes))
+        self._sections = sections
+        self.flush = sections["flush"].tolist()
+        self.unique5 = sections["unique5"].tolist()
+        self.paired = _MappedTable(sections["paired_slots"], sections["paired_slot_ranks"])
+        self.flush_best = sections["flush_best"].tolist()
+        self.by_product = _MappedTable(sections["product_slots"], sections["product_slot_ranks"])
+        self.worst_rank = max(rank for rank, _ in classes.values())
+        self.categories: list[Category] = [Category.STRAIGHT_FLUSH] * (self.worst_rank + 1)
+        for rank, category in classes.values():
+            self.categories[rank] = category
+        self.royal_rank = self.flush[_ROYAL_BITS] if variant.flushes and Rank.TEN in variant.ranks else 0
+        self._flush_first = variant.flushes and not variant.low
+        self._numpy = None
+
+    def rank_of_state(self, product: int, suit_masks: list[int]) -> int:
+        if self.variant.flushes:
+            for bits in suit_masks:
+                if bits.bit_count() >= 5:
+                    if self._flush_first:
+                        return self.flush_best[bits]
+                    return self._best_of_subsets(suit_masks)
+        return self.by_product.get(product, 0)
+
+    def _best_of_subsets(self, suit_masks: list[int]) -> int:
+        cards = [(rank, suit) for suit, bits in enumerate(suit_masks) for rank in range(13) if bits >> rank & 1]
+        best = 0
+        for five in combinations(cards, 5):
+            bits = 0
+            for rank, _ in five:
+                bits |= 1 << rank
+            if all(suit == five[0][1] for _, suit in five):
+                rank = self.flush[bits]
+            else:
+                rank = self.unique5[bits] or self.paired.get(_prime_product(rank for rank, _ in five), 0)
+            if not rank:
+                return 0
+            if not best or rank < best:
+                best = rank
+        return best
+
+    def evaluate(self, cards: Iterable[Card]) -> int:
+        """Rank 5 to 7 cards; raises ValueError for jokers or cards outside the deck."""
+        cards = list(cards)
+        if not 5 <= len(cards) <= 7:
+            raise ValueError(f"Expected 5 to 7 cards, got {len(cards)}")
+        product = 1
+        suits = [0, 0, 0, 0]
+        for card in cards:
+            if card.id >= 52:
+                raise ValueError(f"Jokers aren't played in {self.variant.name}")
+            product *= card.prime
+            suits[card.id & 3] |= card.rank_bit
+        rank = self.rank_of_state(product, suits)
+        if not rank:
+            raise ValueError(f"Not a valid {self.variant.name} hand: {', '.join(map(str, cards))}")
+        return rank
+
+    def evaluate_batch(self, card_ids):
+        import numpy as np
+
+        tables = self._numpy_tables()
+        ids = np.asarray(card_ids, dtype=np.intp)
+        if ids.size and ids.max() >= 52:
+            raise ValueError(f"Jokers aren't played in {self.variant.name}")
+        exact_flushes = self._flush_first or (ids.ndim == 2 and ids.shape[1] == 5)
+        ranks, _, suited = _lookup_batch(ids, tables, flushes=self.variant.flushes and exact_flushes)
+        if self.variant.flushes and not exact_flushes:
+            for suit in range(4):
+                for row in np.flatnonzero(tables["flush"][(suited >> 13 * suit) & 0x1FFF] > 0).tolist():
+                    packed = int(suited[row])
+                    ranks[row] = self._best_of_subsets([packed >> 13 * suit & 0x1FFF for suit in range(4)])
+        if len(ranks) and not ranks.all():
+            raise ValueError(f"Not a valid {self.variant.name} hand in row {int(np.argmin(ranks))}")
+        return ranks, tables["category"][ranks]
+
+    def _numpy_tables(self):
+        if self._numpy is None:
+            import numpy as np
+
+            self._numpy = {
+                "flush": np.frombuffer(self._sections["flush_best"], dtype=np.int16),
+                "products": np.frombuffer(self._sections["product_keys"], dtype=np.int64),
+                "product_ranks": np.frombuffer(self._sections["product_ranks"], dtype=np.int16),
+                "category": np.array(self.categories, dtype=np.int8),
+            }
+        return self._numpy
+
+
+def _rules(variant: Variant) -> tuple:
+    return dataclasses.astuple(variant)[1:]
+
+
+def _table_path(variant: Variant) -> str:
+    """Where ``variant``'s tables are cached, beside the standard ones and keyed by its rules."""
+    root, extension = os.path.splitext(table_path())
+    digest = hashlib.sha256(repr(_rules(variant)).encode()).hexdigest()[:12]
+    return f"{root}-{variant.name}-{digest}{extension}"
+
+
+def _build_sections(variant: Variant, classes=None) -> dict:
+    """``strength._build_table_sections`` for ``variant``."""
+    classes = classes or _rank_keys(variant)
+    flush = [0] * 8192
+    unique5 = [0] * 8192
+    paired = {}
+    for (ranks, suited), (rank, _) in classes.items():
+        if len(set(ranks)) == 5:
+            (flush if suited else unique5)[sum(1 << index for index in ranks)] = rank
+        else:
+            paired[_prime_product(ranks)] = rank
+    primes = [RANK_PRIMES[RANKS.index(rank)] for rank in variant.ranks]
+    flush_best, by_product = _build_best_of_tables(flush, unique5, paired, primes)
+    return _pack_sections(flush, unique5, paired, flush_best, by_product)
+
+
+def _rank_keys(variant: Variant) -> dict[tuple[tuple[int, ...], bool], tuple[int, Category]]:
+    """Order every 5-card class of ``variant``, keyed by its rank indexes (descending) and whether it's a flush.
+
+    Returns each class's rank, 1 being the best, and its category. Classes
+    the rules can't tell apart, e.g. flushes where they don't count, share
+    a rank.
+    """
+    deck_ranks = sorted(RANKS.index(rank) for rank in variant.ranks)
+    ace = RANKS.index(Rank.ACE)
+
+    def value(rank: int) -> int:
+        return -1 if variant.ace_low and rank == ace else rank
+
+    order = sorted(deck_ranks, key=value)
+    if variant.wheel and not variant.ace_low and ace in order:
+        order = [ace] + order
+    straights = {}
+    if variant.straights:
+        for height, window in enumerate(order[index : index + 5] for index in range(len(order) - 4)):
+            straights[sum(1 << rank for rank in window)] = height
+
+    categories = list(Category)
+    if variant.flush_beats_full_house:
+        categories[Category.FLUSH], categories[Category.FULL_HOUSE] = Category.FULL_HOUSE, Category.FLUSH
+    strength_of = {category: position for position, category in enumerate(categories)}
+
+    classes = {}
+    multisets = [
+        ranks
+        for size in range(2, 6)
+        for distinct in combinations(reversed(deck_ranks), size)
+        for ranks in _spread(distinct, 5)
+    ]
+    for ranks in multisets:
+        counts = Counter(ranks)
+        shape = sorted(counts.values(), reverse=True)
+        bits = sum(1 << rank for rank in counts)
+        for flush in ((False, True) if len(counts) == 5 else (False,)):
+            straight = len(counts) == 5 and bits in straights
+            suited = flush and variant.flushes
+            if straight and suited:
+                category = Category.STRAIGHT_FLUSH
+            elif shape[0] == 4:
+                category = Category.FOUR_OF_A_KIND
+            elif shape == [3, 2]:
+                category = Category.FULL_HOUSE
+            elif suited:
+                category = Category.FLUSH
+            elif straight:
+                category = Category.STRAIGHT
+            elif shape[0] == 3:
+                category = Category.THREE_OF_A_KIND
+            elif shape == [2, 2, 1]:
+                category = Category.TWO_PAIR
+            elif shape[0] == 2:
+                category = Category.ONE_PAIR
+            else:
+                category = Category.HIGH_CARD
+            if straight:
+                tiebreak = (straights[bits],)
+            else:
+                # Bigger groups first, then higher ranks: (pair, kickers...).
+                tiebreak = tuple(value(rank) for rank in sorted(counts, key=lambda rank: (-counts[rank], -value(rank))))
+            classes[ranks, flush] = ((strength_of[category], tiebreak), category)
+
+    keys = sorted({key for key, _ in classes.values()}, reverse=not variant.low)
+    numbering = {key: rank for rank, key in enumerate(keys, 1)}
+    return {class_: (numbering[key], category) for class_, (key, category) in classes.items()}
+
+
+def _spread(distinct: tuple[int, ...], size: int) -> Iterable[tuple[int, ...]]:
+    """Every multiset of ``size`` ranks using each of ``distinct`` at least once and at most four times."""
+    if len(distinct) == 1:
+        if 1 <= size <= 4:
+            yield (distinct[0],) * size
+        return
+    for copies in range(1, min(4, size - len(distinct) + 1) + 1):
+        for rest in _spread(distinct[1:], size - copies):
+            yield (distinct[0],) * copies + rest
+
+
+_tables: dict[Variant, VariantTables] = {}
+VARIANTS: dict[str, Variant] = {}
+
+
+def register(variant: Variant) -> Variant:
+    """Add ``variant`` to ``VARIANTS`` under its name."""
+    if VARIANTS.get(variant.name, variant) != variant:
+        raise ValueError(f"Another variant is already registered as {variant.name!r}")
+    VARIANTS[variant.name] = variant
+    return variant
+
+
+def get_variant(name: str) -> Variant:
+    try:
+        return VARIANTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown variant: {name!r}") from None
+
+
+STANDARD = register(Variant("standard"))
+# 36 cards, six to ace. A flush is harder to make than a full house, so it
+# ranks above one, and A-6-7-8-9 is the lowest straight.
+SHORT_DECK = register(
+    Variant("short-deck", ranks=tuple(rank for rank in RANKS if rank.value >= 6), flush_beats_full_house=True)
+)
+# Aces are low and straights and flushes don't count: 5-4-3-2-A is best.
+ACE_TO_FIVE = register(Variant("ace-to-five", low=True, ace_low=True, straights=False, flushes=False))
+# Aces are high and straights and flushes count against you: 7-5-4-3-2 is best.
+DEUCE_TO_SEVEN = register(Variant("deuce-to-seven", low=True, wheel=False))
+
+
+def test_generic_tables_reproduce_the_standard_ones():
+    """Test that building the standard rules from scratch gives the shipped tables."""
+    import strength
+
+    built = _build_sections(STANDARD)
+    for name, section in built.items():
+        assert list(section) == list(strength._TABLES[name]), name
+
+
+def test_variant_rules():
+    """Test the best and special hands of each registered variant."""
+    assert ACE_TO_FIVE.evaluate(Hand.from_str("5♥ 4♦ 3♣ 2♠ A♥")) == 1
+    assert ACE_TO_FIVE.evaluate(Hand.from_str("5♥ 4♥ 3♥ 2♥ A♥")) == 1
+    assert ACE_TO_FIVE.evaluate(Hand.from_str("K♥ K♦ K♠ K♣ Q♥")) == ACE_TO_FIVE.tables().worst_rank == 6175
+    assert DEUCE_TO_SEVEN.evaluate(Hand.from_str("7♥ 5♦ 4♣ 3♠ 2♥")) == 1
+    wheel = DEUCE_TO_SEVEN.evaluate(Hand.from_str("5♥ 4♦ 3♣ 2♠ A♥"))
+    assert DEUCE_TO_SEVEN.category_of(wheel) == Category.HIGH_CARD
+    assert DEUCE_TO_SEVEN.evaluate(Hand.from_str("7♥ 5♥ 4♥ 3♥ 2♥")) > DEUCE_TO_SEVEN.evaluate(Hand.from_str("K♥ Q♦ J♣ 9♠ 8♥"))
+    assert SHORT_DECK.evaluate(Hand.from_str("A♥ K♥ Q♥ J♥ 10♥")) == 1
+    assert SHORT_DECK.category_of(SHORT_DECK.evaluate(Hand.from_str("A♥ 6♦ 7♣ 8♠ 9♥"))) == Category.STRAIGHT
+    assert SHORT_DECK.evaluate(Hand.from_str("A♥ Q♥ 9♥ 8♥ 6♥")) < SHORT_DECK.evaluate(Hand.from_str("A♥ A♦ A♣ K♠ K♥"))
+    assert len(SHORT_DECK.deck()) == 36 and get_variant("short-deck") is SHORT_DECK
+    for text in ["A♥ K♥ Q♥ J♥ 2♥", "A♥ K♥ Q♥ J♥ 🃏"]:
+        try:
+            SHORT_DECK.evaluate(Hand.from_str(text))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{text} was ranked")
+
+
+def test_best_of_seven_and_batch():
+    """Test six and seven card hands against their best five, scalar and batched."""
+    import random
+
+    rng = random.Random(2)
+    for variant in VARIANTS.values():
+        suits = [[card for card in variant.cards if card.id & 3 == suit] for suit in range(4)]
+        hands = [rng.sample(variant.cards, rng.choice([6, 7])) for _ in range(200)]
+        # Hands holding five of a suit take the slower path outside high-hand games.
+        hands += [rng.sample(suits[0], 5) + rng.sample(suits[1] + suits[2], 2) for _ in range(100)]
+        for cards in hands:
+            best = min(variant.evaluate(five) for five in combinations(cards, 5))
+            assert variant.evaluate(cards) == variant.rank(Hand(cards)) == best, (variant.name, cards)
+        try:
+            import numpy as np
+        except ImportError:
+            continue
+        rows = [cards for cards in hands if len(cards) == 7]
+        ranks, _ = variant.evaluate_batch(np.array([[card.id for card in cards] for cards in rows]))
+        assert ranks.tolist() == [variant.evaluate(cards) for cards in rows]
+
+
+def test_short_deck_frequencies():
+    """Test the category counts over all 376,992 short-deck hands."""
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    from enumeration import combinations_array
+
+    ids = np.array([card.id for card in SHORT_DECK.cards])
+    _, categories = SHORT_DECK.evaluate_batch(ids[combinations_array(36, 5)])
+    assert np.bincount(categories, minlength=len(Category)).tolist() == [
+        122400, 193536, 36288, 16128, 6120, 480, 1728, 288, 24
+    ]
+
+
+def test_cache_and_equity_with_a_variant():
+    """Test that the cache, evaluations and equity follow a variant's rules."""
+    from equity import hand_equity, hand_equity_exact
+    from strength import EvaluationCache, HandStrengthEvaluation
+
+    cache = EvaluationCache(variant=DEUCE_TO_SEVEN)
+    seven_low = Hand.from_str("7♥ 5♦ 4♣ 3♠ 2♥")
+    assert cache.rank(seven_low) == 1 and cache.rank(Hand.from_str("2♥ 3♠ 4♣ 5♦ 7♥")) == 1
+    assert cache.stats().hits == 1
+    evaluation = HandStrengthEvaluation(Hand.from_str("A♥ K♥ Q♥ J♥ 10♥"), cache=cache)
+    assert evaluation.has_royal_flush() and evaluation.rank() == 7462
+
+    # Drawing one card to 9-8-7-6 in a short deck, where there are no fives:
+    # a ten or either ace left (A-6-7-8-9) makes the straight.
+    exact = hand_equity_exact(Hand.from_str("9♥ 8♦ 7♣ 6♠"), Hand.from_str("A♥ A♦ K♣ K♠ Q♥"), variant=SHORT_DECK)
+    assert exact.trials == 36 - 9
+    assert exact.wins == 4 + 2 and exact.losses == 27 - 6
+    simulated = hand_equity(
+        Hand.from_str("9♥ 8♦ 7♣ 6♠"), Hand.from_str("A♥ A♦ K♣ K♠ Q♥"), trials=2000, workers=1, seed=1, variant=SHORT_DECK
+    )
+    assert abs(simulated.equity - exact.equity) < 0.05